@@ -1,46 +1,12 @@
 import logging
 import os
-import struct
 
-from src.vive_decoder import ViveDecoder
-import csv
+import numpy as np
 
+from src.recording import decode_recording
+import csv
 
-def load_from_bin(file_path):
-    rec = []
-    if not os.path.exists(file_path):
-        logging.error(f"File not found: {file_path}")
-        return
-    with open(file_path, "rb") as f:
-        # Read the header
-        first = f.read(4)
-        if not first:
-            logging.error("File is empty or corrupted.")
-            return
-        start_time = struct.unpack("<f", first)[0]
-        length = struct.unpack("I", f.read(4))[0]
-        if length != 0:
-            logging.warning(
-                "File might be old and recording time is wrong. Interpreting header as data...."
-            )
-            data = f.read(length)
-        logging.info(f"Recording time: {start_time}")
 
-        while True:
-            first = f.read(4)
-            if not first:
-                logging.info("End of file reached.")
-                break
-            if first == b"\x00":
-                logging.info("End of file reached.")
-                break
-            timestamp = struct.unpack("<f", first)[0]
-            length = struct.unpack("I", f.read(4))[0]
-            data = f.read(length)
-            rec.append((timestamp, data))
-            
-    return rec
-            
 def main(no_ppl, rec_path, ignore_list):
     # check if the path exists
     if not os.path.exists(rec_path):
@@ -83,41 +49,27 @@ def main(no_ppl, rec_path, ignore_list):
                 logging.error(f"Recording file not found: {recording_path}")
                 continue
 
-            decoder = ViveDecoder()
-            decoder.set_ignored_vive_tracker_names(ignore_list)
-            
-            data = load_from_bin(recording_path)
+            # label is the index of the recording
+            label = train_recordings.index(recording)
+            logging.info(f"Processing recording: {recording}, label: {label}")
+
+            tracking = decode_recording(recording_path, ignore_list)
+
+            empty_frames = np.flatnonzero(~tracking.present.any(axis=1))
+            if len(empty_frames) > 0:
+                logging.warning(f"No trackers found in {len(empty_frames)} frames.")
+
+            # x, y (unity x, z) of the tracked trackers of each frame
+            tracked = tracking.tracked & tracking.present
+            xy = tracking.positions[:, :, [0, 2]].tolist()
             
-            table = []
-            for d in data:
-                if d is None:
-                    continue
-                # timestamp = d[0]
-                # label is the index of the recording
-                label = train_recordings.index(recording)
-                logging.info(f"Processing recording: {recording}, label: {label}")
-                decoder.decode(d[1])
-                trackers = decoder.vive_trackers
-                if trackers is None or len(trackers) == 0:
-                    logging.warning("No trackers found in the decoded data.")
-                    continue
-                
-                # augment the data
-                
+            writer = csv.writer(csvfile)
+            for frame in np.flatnonzero(tracking.present.any(axis=1)).tolist():
                 # row = [timestamp]
                 row = [label]
-                for tracker in trackers:
-                    if tracker["is_tracked"]:
-                        x = tracker["position"][0]
-                        y = tracker["position"][2]
-                        row.append(x)
-                        row.append(y)
-                table.append(row)
-                
-                # write the data to csv
-                writer = csv.writer(csvfile)
-                for row in table:
-                    writer.writerow(row)
+                for column in np.flatnonzero(tracked[frame]).tolist():
+                    row.extend(xy[frame][column])
+                writer.writerow(row)
 
 if __name__ == "__main__":
 
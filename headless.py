@@ -0,0 +1,65 @@
+import asyncio
+import json
+import logging
+
+from src.async_runtime import AsyncPipeline
+
+
+def main(config_path, file_path, receive, duration, rate):
+    config = {}
+    if config_path:
+        with open(config_path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+    pipeline = AsyncPipeline(config, file_path=file_path, receive=receive, rate=rate)
+    try:
+        asyncio.run(pipeline.run(duration))
+    except KeyboardInterrupt:
+        logging.info("Interrupted.")
+
+
+if __name__ == "__main__":
+
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Run the processing pipeline without the UI on a single event loop."
+    )
+    parser.add_argument(
+        "-c",
+        "--config",
+        type=str,
+        help="Path to the configuration file",
+        default="config.json",
+    )
+    parser.add_argument(
+        "-f",
+        "--file",
+        type=str,
+        help="Recording (.bin) to play back in a loop",
+        default=None,
+    )
+    parser.add_argument(
+        "--no-receiver",
+        action="store_true",
+        help="Do not receive from the network, e.g. to only play back a recording",
+    )
+    parser.add_argument(
+        "-d",
+        "--duration",
+        type=float,
+        help="Stop after this many seconds",
+        default=None,
+    )
+    parser.add_argument(
+        "-r",
+        "--rate",
+        type=float,
+        help="Play the recording this many times faster than recorded",
+        default=1.0,
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO, format="%(filename)s - %(levelname)s - %(message)s"
+    )
+    main(args.config, args.file, not args.no_receiver, args.duration, args.rate)
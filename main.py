@@ -1,4 +1,5 @@
 import logging
+import functools
 import json
 
 import tkinter as tk
@@ -6,17 +7,31 @@ from tkinter import ttk
 from tkinter import filedialog
 from tkinter import messagebox
 
-from src.sources import UDPReceiverQ, Player, Synchronizer
+from src.sources import UDPReceiverQ, MultiUDPReceiverQ, Player, Synchronizer
 from src.senders import UDPSenderQ
 from src.recorder import Recorder
 from src.processor import Processor
 from src.vive_visualizer import ViveVisualizer
 from src.analyser import Analyser
+from src.channels import POLICIES, make_channel
+from src.latency import LatencyStats
+from src.replay_cache import ReplayCache
 
 logging.basicConfig(
     level=logging.INFO, format="%(filename)s - %(levelname)s - %(message)s"
 )
 
+# queue policy of each pipeline edge: receiver -> synchronizer, synchronizer ->
+# processor, processor -> sender and processor -> visualizer. "latest" drops
+# stale items instead of building up a backlog, "direct" (sender only) sends
+# from the processor thread without a queue.
+DEFAULT_CHANNELS = {
+    "receiver": "latest",
+    "synchronizer": "latest",
+    "sender": "direct",
+    "visualizer": "latest",
+}
+
 
 class App(tk.Tk):
     def __init__(self, config=None):
@@ -26,6 +41,10 @@ class App(tk.Tk):
         # default network settings
         self.receiver_ip = "127.0.0.1"
         self.receiver_port = 2221
+        # kernel receive buffer in bytes, None keeps the system default
+        self.receiver_rcvbuf = None
+        # datagrams are received into this many reused buffers, 0 copies each
+        self.receiver_pool_size = 0
         self.sender_ip = "127.0.0.1"
         self.sender_ip_list = ["192.168.50.255"]
         self.sender_port = 2223
@@ -48,6 +67,9 @@ class App(tk.Tk):
         self.src = None
         self.synchronizer = None
         self.analyser = None
+        self.channels = dict(DEFAULT_CHANNELS)
+        # per stage latency of the processing pipeline, config "latency_stats"
+        self.latency = None
 
         if config:
             # Load configuration from file
@@ -61,11 +83,24 @@ class App(tk.Tk):
                 self.receiver_port = self.config_data.get(
                     "receiver_port", self.receiver_port
                 )
+                self.receiver_rcvbuf = self.config_data.get(
+                    "receiver_rcvbuf", self.receiver_rcvbuf
+                )
+                self.receiver_pool_size = self.config_data.get(
+                    "receiver_pool_size", self.receiver_pool_size
+                )
                 self.sender_ip = self.config_data.get("sender_ip", self.sender_ip)
                 self.sender_port = self.config_data.get("sender_port", self.sender_port)
                 self.ignore_vive_tracker_names = self.config_data.get(
                     "ignore_vive_tracker_names", self.ignore_vive_tracker_names
                 )
+                for edge, policy in self.config_data.get("channels", {}).items():
+                    if edge not in self.channels:
+                        logging.warning(f"Unknown channel: {edge}")
+                    elif policy in POLICIES or (edge == "sender" and policy == "direct"):
+                        self.channels[edge] = policy
+                    else:
+                        logging.warning(f"Unknown policy {policy} for channel {edge}")
                 
         
 
@@ -74,8 +109,14 @@ class App(tk.Tk):
         self.state = self.states[0]
         self.init_ui()
         
-        self.player = Player()
-        self.visualizer = ViveVisualizer(self.canvas, self)
+        self.player = Player(
+            streaming=(
+                self.config_data.get("player_streaming", False) if self.config_data else False
+            )
+        )
+        self.visualizer = ViveVisualizer(
+            self.canvas, self, channel=make_channel(self.channels["visualizer"])
+        )
         self.visualizer.start()
         
         # set UI
@@ -453,19 +494,47 @@ class App(tk.Tk):
             self.receiver_ip = ""
 
     def close_all_actors(self):
+        # producers blocked on a full bounded channel must not hold up the stops
+        channels = self.pipeline_channels()
+        for edge in ("receiver", "synchronizer", "sender"):
+            if hasattr(channels[edge], "close"):
+                channels[edge].close()
         if self.processor:
+            if self.processor.replay_cache is not None:
+                logging.info(f"Replay cache: {self.processor.replay_cache.stats()}")
             self.processor.close()
         if self.recorder:
             self.recorder.close()
         if self.player:
             self.player.close()
         if self.receiver:
+            if hasattr(self.receiver, "stats") and self.receiver.is_running():
+                logging.info(f"Receiver: {self.receiver.stats()}")
             self.receiver.close()
         if self.sender:
             self.sender.close()
         if self.synchronizer:
             self.synchronizer.clear_callbacks()
             self.synchronizer.close()
+        self.log_channel_stats()
+        if self.latency:
+            self.latency.log()
+            self.latency.clear()
+
+    def pipeline_channels(self):
+        """The channel of every pipeline edge, None where there is none."""
+        return {
+            "receiver": self.synchronizer.inbox if self.synchronizer else None,
+            "synchronizer": self.synchronizer.queue if self.synchronizer else None,
+            "sender": self.sender.queue if self.sender else None,
+            "visualizer": getattr(getattr(self, "visualizer", None), "queue", None),
+        }
+
+    def log_channel_stats(self):
+        """Log how many items the latest-value and bounded channels dropped."""
+        for edge, channel in self.pipeline_channels().items():
+            if hasattr(channel, "stats") and channel.dropped:
+                logging.info(f"Channel {edge}: {channel.stats()}")
 
     ### CONNECTION
 
@@ -532,10 +601,11 @@ class App(tk.Tk):
         logging.info(
             f"Starting recording with receiver: {self.receiver_ip}:{self.receiver_port} and sender: {self.sender_ip}:{self.sender_port}"
         )
-        self.receiver = UDPReceiverQ(ip=self.receiver_ip, port=self.receiver_port)
         self.sender = UDPSenderQ(ip=self.sender_ip, port=self.sender_port)
-        self.recorder = Recorder(
-            callback_data=self.receiver.get_data_block, callback=self.sender.update
+        # the receiver pushes into the recorder, which sleeps until a packet arrives
+        self.recorder = Recorder(callback=self.sender.update)
+        self.receiver = UDPReceiverQ(
+            ip=self.receiver_ip, port=self.receiver_port, callback=self.recorder.update
         )
         if not self.receiver.start():
             messagebox.showerror(
@@ -595,29 +665,53 @@ class App(tk.Tk):
             if self.processor:
                 if self.receiver:
                     self.receiver.close()
-                self.receiver = UDPReceiverQ(
-                    ip=self.receiver_ip, port=self.receiver_port
-                )
-                if not self.receiver.start():
-                    messagebox.showerror(
-                        "Error", "Failed to start receiver. Check the IP and Port."
-                    )
-                    return
-                if self.synchronizer:
-                    self.synchronizer.add_callback(
-                        {
-                            "name": "receiver",
-                            "callback": self.receiver.get_data_block,
-                            "timeout": 0.1,
-                        }
-                    )
+                if self.synchronizer and self.start_receiver():
                     logging.info("Sync with Receiver enabled.")
         else:
             if self.processor:
                 if self.receiver:
+                    self.receiver.close()
+                    self.receiver = None
                     if self.synchronizer:
-                        self.synchronizer.remove_callback("receiver")
+                        # the receiver or the endpoints and senders of a multi receiver
+                        for source in list(self.synchronizer.sources):
+                            if source != "player":
+                                self.synchronizer.remove_source(source)
                         logging.info("Sync with Receiver disabled.")
+
+    def start_receiver(self):
+        """Start the receiver of the live sources, it pushes into the synchronizer."""
+        endpoints = self.config_data.get("receiver_endpoints") if self.config_data else None
+        if endpoints:
+            # one thread for all ports, every endpoint or sender is its own source
+            self.receiver = MultiUDPReceiverQ(
+                [(endpoint["ip"], endpoint["port"]) for endpoint in endpoints],
+                source_by=self.config_data.get("receiver_source_by", "endpoint"),
+                pool_size=self.receiver_pool_size,
+                timestamps=self.latency is not None,
+                rcvbuf=self.receiver_rcvbuf,
+            )
+            # the synchronizer gives the pooled buffers back once it stored the records
+            self.receiver.callback = functools.partial(
+                self.synchronizer.push_datagram, release=self.receiver.release
+            )
+        else:
+            self.receiver = UDPReceiverQ(
+                ip=self.receiver_ip,
+                port=self.receiver_port,
+                pool_size=self.receiver_pool_size,
+                timestamps=self.latency is not None,
+                rcvbuf=self.receiver_rcvbuf,
+            )
+            self.receiver.callback = self.synchronizer.add_source(
+                "receiver", release=self.receiver.release
+            )
+        if not self.receiver.start():
+            messagebox.showerror(
+                "Error", "Failed to start receiver. Check the IP and Port."
+            )
+            return False
+        return True
                         
     def analyze_data(self):
         if not self.file_path:
@@ -650,52 +744,98 @@ class App(tk.Tk):
         self.close_all_actors()
         self.disconnect_test()
 
+        # packets are stamped on arrival and their latency counted when sent
+        if self.config_data and self.config_data.get("latency_stats"):
+            self.latency = LatencyStats()
+        else:
+            self.latency = None
+
         # start the sender
-        self.sender = UDPSenderQ(ip=self.sender_ip, port=self.sender_port)
+        direct = self.channels["sender"] == "direct"
+        self.sender = UDPSenderQ(
+            ip=self.sender_ip,
+            port=self.sender_port,
+            channel=None if direct else make_channel(self.channels["sender"]),
+            latency=self.latency,
+        )
         if not self.sender.start():
             messagebox.showerror(
                 "Error", "Failed to start sender. Check the IP and Port."
             )
             return
 
-        self.synchronizer = Synchronizer()
+        # a recording played as fast as the pipeline takes it (load test) or
+        # at a multiple of its recorded speed
+        rate = self.config_data.get("playback_rate", 1.0) if self.config_data else 1.0
+        unthrottled = bool(
+            self.file_path
+            and self.config_data
+            and self.config_data.get("playback_unthrottled", False)
+        )
+        if unthrottled:
+            # bounded edges hold the player back instead of dropping frames
+            channel = make_channel("bounded", 8)
+            inbox = make_channel("bounded", 16)
+        else:
+            channel = make_channel(self.channels["synchronizer"])
+            # the newest packet per source
+            inbox = make_channel(self.channels["receiver"], maxsize=16, key=lambda item: item[0])
+
+        # the processor runs in this process, skip encoding and decoding between them;
+        # with an output rate the frames are resampled to a fixed clock
+        self.synchronizer = Synchronizer(
+            output_rate=(
+                self.config_data.get("output_rate") if self.config_data else None
+            ),
+            channel=channel,
+            inbox=inbox,
+        )
+        # the array pipeline decodes packets in place, the dict pipeline gets frames
+        self.synchronizer.set_frame_mode(
+            not (self.config_data and self.config_data.get("array_pipeline", False))
+        )
+        self.synchronizer.set_stamping(self.latency is not None)
 
+        # the sources push their packets, a frame is merged as soon as one arrives
         if self.file_path:
-            self.player.load(self.file_path)
+            # more recordings to play after the loaded one, or all at once with overlay
+            playlist = self.config_data.get("player_playlist") if self.config_data else None
+            if playlist:
+                self.player.load_playlist(
+                    [self.file_path] + playlist,
+                    overlay=self.config_data.get("player_overlay", False),
+                )
+            else:
+                self.player.load(self.file_path)
+            # [start, end] seconds of the recording to play, either may be null
+            trim = self.config_data.get("player_trim") if self.config_data else None
+            self.player.set_trim(*(trim or ()))
+            try:
+                self.player.set_rate(rate)
+            except ValueError as e:
+                messagebox.showerror("Error", str(e))
+                return
+            self.player.set_unthrottled(unthrottled)
+            if unthrottled:
+                logging.info("Playing unthrottled, the pipeline sets the pace.")
+            self.player.set_callback(self.synchronizer.add_source("player"))
             if not self.player.start():
                 messagebox.showerror("Error", "Failed to start Player.")
                 return
-            self.synchronizer.add_callback(
-                {
-                    "name": "player",
-                    "callback": self.player.get_data_block,
-                    "timeout": 0.1,
-                }
-            )
 
         if self.sync_with_receiver_var.get() or self.file_path is None:
-            self.receiver = UDPReceiverQ(ip=self.receiver_ip, port=self.receiver_port)
-            if not self.receiver.start():
-                messagebox.showerror(
-                    "Error", "Failed to start receiver. Check the IP and Port."
-                )
+            if not self.start_receiver():
                 return
-            self.synchronizer.add_callback(
-                {
-                    "name": "receiver",
-                    "callback": self.receiver.get_data_block,
-                    "timeout": 0.1,
-                }
-            )
 
         if not self.synchronizer.start():
             messagebox.showerror("Error", "Failed to start Synchronizer.")
             return
     
-        # start the processor
+        # start the processor, with a direct sender channel it hands the
+        # encoded view straight to the socket
         self.processor = Processor(
             callback_data=self.synchronizer.get_data_block,
-            callback=self.sender.update,
+            callback=self.sender.send if direct else self.sender.update,
             callback_vis=self.visualizer.update,
             config=self.config_data,
         )
@@ -721,6 +861,12 @@ class App(tk.Tk):
             else:
                 logging.info("Not augmenting data.")
                 self.processor.set_augment_data(False)
+        if self.file_path and self.config_data and self.config_data.get("replay_cache"):
+            # a looped recording is processed once, later loops are looked up;
+            # frames with packets of the receiver in them are not cached
+            replay_cache = ReplayCache()
+            self.synchronizer.set_replay_cache(replay_cache, sources=["player"])
+            self.processor.set_replay_cache(replay_cache)
         self.processor.start()
 
         # update the state
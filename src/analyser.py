@@ -6,8 +6,7 @@ import argparse
 import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
-from src.vive_decoder import ViveDecoder
-from src.sources import Player
+from src.recording import decode_recording
 
 # Configure logging
 logging.basicConfig(
@@ -21,62 +20,52 @@ class Analyser:
     def __init__(self, input_file, output_dir):
         self.input_file = input_file
         self.output_dir = output_dir
-        self.decoder = ViveDecoder()
-        self.player = Player()
-        
+        self.recording = None
 
     def process_tracking_data(self):
         """Convert binary data to CSV and return device stats"""
         os.makedirs(self.output_dir, exist_ok=True)
 
-        self.player.load(self.input_file)
-    
-        records = self.player.data
-        
-        if not records:
+        recording = decode_recording(self.input_file)
+
+        if recording is None or len(recording) == 0:
             logging.error("No data processed. Exiting.")
             return None
 
+        self.recording = recording
         self.device_stats = {}
         self.all_data = {}
 
-        # Process each data chunk
-        for timestamp, binary_chunk in records:
-            self.decoder.decode(binary_chunk)
-            for tracker in self.decoder.vive_trackers:
-                name = tracker["name"]
-                
-                # Initialize tracker storage
-                if name not in self.all_data:
-                    self.all_data[name] = []
-                    self.device_stats[name] = {
-                        'total': 0,
-                        'errors': 0,
-                        'positions': []
-                    }
-                
-                # Record tracking status
-                self.device_stats[name]['total'] += 1
-                if tracker["tracking_result"] != 2:  # 2 = good tracking
-                    self.device_stats[name]['errors'] += 1
+        # Process each tracker column
+        for name, column in recording.index.items():
+            seen = recording.present[:, column]
+            timestamps = recording.timestamps[seen]
+            positions = recording.positions[seen, column]
+            rotations = recording.rotations[seen, column]
+            tracking_result = recording.tracking_result[seen, column]
 
+            # Record tracking status
+            self.device_stats[name] = {
+                'total': len(timestamps),
+                'errors': int(np.sum(tracking_result != 2)),  # 2 = good tracking
                 # Store position and tracking result for visualization
-                self.device_stats[name]['positions'].append((
-                    timestamp,
-                    tracker["position"][0],
-                    tracker["position"][2],  # Using X and Z for 2D plot
-                    tracker["tracking_result"]
-                ))
-                
-                # Prepare CSV data
-                self.all_data[name].append([
-                    timestamp,
-                    *tracker["position"],  # x, y, z
-                    *tracker["rotation"],  # qx, qy, qz, qw
-                    tracker["status"],
-                    tracker["is_tracked"],
-                    tracker["tracking_result"]
-                ])
+                'positions': np.column_stack((
+                    timestamps,
+                    positions[:, 0],
+                    positions[:, 2],  # Using X and Z for 2D plot
+                    tracking_result
+                )),
+            }
+
+            # Prepare CSV data
+            self.all_data[name] = list(zip(
+                timestamps.tolist(),
+                *positions.T.tolist(),  # x, y, z
+                *rotations.T.tolist(),  # qx, qy, qz, qw
+                recording.status[seen, column].tolist(),
+                recording.tracked[seen, column].tolist(),
+                tracking_result.tolist()
+            ))
 
         # Write CSV files
         for name, records in self.all_data.items():
@@ -108,7 +97,7 @@ class Analyser:
         # Plot device trajectories
         logging.info("Generating trajectory plot...")
         for device, data in self.device_stats.items():
-            if not data['positions']:
+            if len(data['positions']) == 0:
                 continue
                 
             # Extract positions and tracking status
@@ -147,7 +136,7 @@ class Analyser:
         
         # Find global time range
         for data in self.device_stats.values():
-            if data['positions']:
+            if len(data['positions']) > 0:
                 positions = np.array(data['positions'])
                 min_time = min(min_time, np.min(positions[:, 0]))
                 max_time = max(max_time, np.max(positions[:, 0]))
@@ -164,7 +153,7 @@ class Analyser:
         
         # Plot error rates for each device
         for device, data in self.device_stats.items():
-            if not data['positions']:
+            if len(data['positions']) == 0:
                 continue
                 
             positions = np.array(data['positions'])
@@ -0,0 +1,186 @@
+import asyncio
+import logging
+import queue
+import socket
+import time
+
+from src.channels import LatestQueue
+from src.processor import Processor
+from src.recording import load_from_bin
+from src.sources import Synchronizer
+
+
+class _ReceiverProtocol(asyncio.DatagramProtocol):
+    def __init__(self, pipeline, name):
+        self.pipeline = pipeline
+        self.name = name
+
+    def datagram_received(self, data, addr):
+        self.pipeline.on_packet(self.name, data)
+
+    def error_received(self, exc):
+        logging.error(f"Socket error while receiving data: {exc}")
+
+
+class AsyncPipeline:
+    """
+    The live pipeline of main.py on one asyncio event loop, for headless use.
+
+    Receivers and the sender are datagram endpoints, the Player is replaced
+    by loop.call_at callbacks and merging, processing and the output clock
+    run as callbacks and coroutines of the same loop. No thread is started
+    and nothing polls: the loop sleeps until a datagram, a playback time or
+    a clock tick is due. The Synchronizer, TrackerStore and Processor are
+    the same classes the threaded pipeline uses, only their threads are not
+    started.
+
+    config is the dict of config.json, file_path an optional recording to
+    play back in a loop at rate times the recorded speed.
+    """
+
+    def __init__(self, config=None, file_path=None, receive=True, rate=1.0):
+        config = config or {}
+        self.config = config
+        self.file_path = file_path
+        self.rate = rate
+        self.receivers = []
+        if receive:
+            self.receivers.append(
+                ("receiver", config.get("receiver_ip", ""), config.get("receiver_port", 2221))
+            )
+        sender_ip = config.get("sender_list") or config.get("sender_ip", "127.0.0.1")
+        self.sender_ips = sender_ip if isinstance(sender_ip, list) else [sender_ip]
+        self.sender_port = config.get("sender_port", 2223)
+        self.output_rate = config.get("output_rate")
+
+        # the Synchronizer puts from loop callbacks, frame_ready wakes process()
+        self.frames = LatestQueue()
+        self.frame_ready = asyncio.Event()
+        self.synchronizer = Synchronizer(channel=self.frames, output_rate=self.output_rate)
+        self.synchronizer.set_frame_mode(not config.get("array_pipeline", False))
+        self.processor = Processor(callback_data=None, callback=self.send, config=config)
+        self.processor.set_num_augmentations(config.get("num_augmentations", 1))
+        self.processor.set_augment_data(config.get("augment_data", False))
+        self.processor.set_radius(config.get("blob_radius", 1))
+        self.processor.set_ignore_vive_tracker_names(config.get("ignore_vive_tracker_names", []))
+
+        self.sender_transport = None
+        self.transports = []
+        self.packets_in = 0
+        self.packets_out = 0
+        self._stopped = None
+
+    def on_packet(self, source, data):
+        """Merge a packet of a source, called from the loop for every datagram."""
+        self.packets_in += 1
+        now = time.perf_counter()
+        if self.output_rate:
+            self.synchronizer.update_store([(source, data, now)])
+        else:
+            self.synchronizer.combine([(source, data, now)])
+            self.frame_ready.set()
+
+    def send(self, data):
+        for ip in self.sender_ips:
+            self.sender_transport.sendto(data, (ip, self.sender_port))
+        self.packets_out += 1
+
+    def play(self, loop, data, index, start):
+        """Hand out record index of the recording and schedule the next one."""
+        if self._stopped.is_set():
+            return
+        self.on_packet("player", data[index][1])
+        index += 1
+        if index == len(data):
+            logging.info("Player looped.")
+            index = 0
+            start = loop.time()
+        loop.call_at(start + data[index][0] / self.rate, self.play, loop, data, index, start)
+
+    async def process(self):
+        while True:
+            await self.frame_ready.wait()
+            self.frame_ready.clear()
+            while True:
+                try:
+                    frame = self.frames.get_nowait()
+                except queue.Empty:
+                    break
+                self.processor.process_data(frame)
+
+    async def clock(self, loop):
+        period = 1.0 / self.output_rate
+        next_tick = loop.time()
+        while True:
+            await asyncio.sleep(max(next_tick - loop.time(), 0))
+            self.synchronizer.tick(time.perf_counter())
+            self.frame_ready.set()
+            next_tick += period
+            if next_tick < loop.time():
+                # fell behind, skip the missed ticks instead of bursting
+                next_tick = loop.time() + period
+
+    async def run(self, duration=None):
+        """Run until stop() is called or for duration seconds."""
+        loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+
+        self.sender_transport, _ = await loop.create_datagram_endpoint(
+            asyncio.DatagramProtocol, family=socket.AF_INET, allow_broadcast=True
+        )
+        self.transports.append(self.sender_transport)
+        for name, ip, port in self.receivers:
+            self.synchronizer.add_source(name)
+            transport, _ = await loop.create_datagram_endpoint(
+                lambda name=name: _ReceiverProtocol(self, name),
+                local_addr=(ip, port),
+                family=socket.AF_INET,
+                allow_broadcast=True,
+            )
+            self.transports.append(transport)
+            logging.info(f"Receiving on {ip}:{port}.")
+
+        if self.file_path:
+            data = load_from_bin(self.file_path)
+            if data:
+                self.synchronizer.add_source("player")
+                start = loop.time()
+                loop.call_at(start + data[0][0] / self.rate, self.play, loop, data, 0, start)
+
+        tasks = [asyncio.create_task(self.process())]
+        if self.output_rate:
+            tasks.append(asyncio.create_task(self.clock(loop)))
+        for task in tasks:
+            task.add_done_callback(self.task_done)
+        try:
+            if duration is None:
+                await self._stopped.wait()
+            else:
+                await asyncio.wait_for(self._stopped.wait(), duration)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            self._stopped.set()
+            for task in tasks:
+                task.cancel()
+            for transport in self.transports:
+                transport.close()
+            self.transports = []
+            logging.info(
+                f"Pipeline stopped: {self.packets_in} packets in, {self.packets_out} out, "
+                f"{self.frames.dropped} stale frames dropped."
+            )
+
+    def task_done(self, task):
+        """Stop the pipeline when one of its tasks died, the loop would not tell."""
+        if task.cancelled() or task.exception() is None:
+            return
+        logging.error(
+            f"Pipeline task {task.get_coro().__name__} failed, stopping.",
+            exc_info=task.exception(),
+        )
+        self.stop()
+
+    def stop(self):
+        if self._stopped is not None:
+            self._stopped.set()
@@ -0,0 +1,35 @@
+import collections
+
+
+class BufferPool:
+    """
+    A fixed set of preallocated receive buffers.
+
+    acquire hands out a free bytearray (or None when all are in use) and
+    release takes it back, so receiving does not allocate per datagram.
+    Consumers get memoryviews of the buffers and give them back with
+    release(view.obj) once they are done; the buffer is overwritten by a
+    later datagram after that. Both calls are safe across threads.
+    """
+
+    def __init__(self, count=256, size=1460):
+        self.size = size
+        self.buffers = [bytearray(size) for _ in range(count)]
+        self.free = collections.deque(self.buffers)
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.buffers)
+
+    def available(self):
+        return len(self.free)
+
+    def acquire(self):
+        try:
+            return self.free.popleft()
+        except IndexError:
+            self.misses += 1
+            return None
+
+    def release(self, buffer):
+        self.free.append(buffer)
@@ -0,0 +1,147 @@
+import collections
+import queue
+import threading
+import time
+
+# edge policies, see make_channel
+POLICIES = ("fifo", "latest", "bounded")
+
+
+class LatestQueue:
+    """
+    A bounded queue where the freshest items win.
+
+    It has the put/get interface of queue.Queue but never blocks on put:
+    when maxsize items are waiting the oldest one is dropped. With a key
+    function only the newest item per key is kept, e.g. one packet per
+    source; maxsize then bounds the number of keys. Dropped items are
+    counted in dropped and passed to on_drop if it is set, delivered ones
+    are counted in received.
+    """
+
+    def __init__(self, maxsize=1, key=None):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1.")
+        self.maxsize = maxsize
+        self.key = key
+        self.items = collections.OrderedDict() if key else collections.deque()
+        self.not_empty = threading.Condition()
+        self.on_drop = None
+        self.put_count = 0
+        self.dropped = 0
+        self.received = 0
+
+    def qsize(self):
+        with self.not_empty:
+            return len(self.items)
+
+    def empty(self):
+        return self.qsize() == 0
+
+    def put(self, item, block=True, timeout=None):
+        dropped = None
+        with self.not_empty:
+            self.put_count += 1
+            if self.key is None:
+                if len(self.items) == self.maxsize:
+                    dropped = self.items.popleft()
+                    self.dropped += 1
+                self.items.append(item)
+            else:
+                key = self.key(item)
+                if key in self.items:
+                    dropped = self.items.pop(key)
+                    self.dropped += 1
+                elif len(self.items) == self.maxsize:
+                    dropped = self.items.popitem(last=False)[1]
+                    self.dropped += 1
+                self.items[key] = item
+            self.not_empty.notify()
+        if dropped is not None and self.on_drop is not None:
+            self.on_drop(dropped)
+
+    def put_nowait(self, item):
+        self.put(item, block=False)
+
+    def get(self, block=True, timeout=None):
+        with self.not_empty:
+            if not block:
+                if not self.items:
+                    raise queue.Empty
+            elif timeout is None:
+                while not self.items:
+                    self.not_empty.wait()
+            elif not self.not_empty.wait_for(lambda: self.items, timeout):
+                raise queue.Empty
+            self.received += 1
+            if self.key is None:
+                return self.items.popleft()
+            return self.items.popitem(last=False)[1]
+
+    def get_nowait(self):
+        return self.get(block=False)
+
+    def stats(self):
+        with self.not_empty:
+            return {"put": self.put_count, "dropped": self.dropped, "received": self.received}
+
+
+class BoundedQueue(queue.Queue):
+    """
+    A queue.Queue of maxsize items whose put blocks while it is full, so a
+    producer runs no faster than its consumer (backpressure). Once closed,
+    put no longer blocks and drops what does not fit, which frees producers
+    stuck on a consumer that was stopped. Dropped items are counted in
+    dropped and passed to on_drop if it is set.
+    """
+
+    def __init__(self, maxsize=1):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1.")
+        super().__init__(maxsize)
+        self.closed = False
+        self.on_drop = None
+        self.put_count = 0
+        self.dropped = 0
+
+    def put(self, item, block=True, timeout=None):
+        self.put_count += 1
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while block and not self.closed:
+            # wake up now and then to notice close()
+            wait = 0.1 if deadline is None else min(0.1, deadline - time.monotonic())
+            if wait <= 0:
+                break
+            try:
+                return super().put(item, True, wait)
+            except queue.Full:
+                continue
+        try:
+            super().put(item, False)
+        except queue.Full:
+            self.dropped += 1
+            if self.on_drop is not None:
+                self.on_drop(item)
+
+    def close(self):
+        self.closed = True
+
+    def stats(self):
+        return {"put": self.put_count, "dropped": self.dropped, "waiting": self.qsize()}
+
+
+def make_channel(policy="fifo", maxsize=1, key=None):
+    """
+    Create the queue of a pipeline edge.
+
+    "fifo" is an unbounded queue.Queue that delivers every item, "latest" a
+    LatestQueue that keeps the newest maxsize items (per key) and "bounded"
+    a BoundedQueue that holds the producer back once maxsize items wait.
+    """
+    if policy == "fifo":
+        return queue.Queue()
+    if policy == "latest":
+        return LatestQueue(maxsize, key)
+    if policy == "bounded":
+        return BoundedQueue(maxsize)
+    raise ValueError(f"Unknown channel policy: {policy}")
@@ -38,9 +38,9 @@ class Classifier:
         
     def preprocess_data(self, data):
 
-        trackers = [np.nan] * self.input_size
-        trackers[:len(data)] = data
-        trackers = np.array(trackers).astype(np.float32).reshape(1, -1)
+        data = np.asarray(data, dtype=np.float32).ravel()[: self.input_size]
+        trackers = np.full((1, self.input_size), np.nan, dtype=np.float32)
+        trackers[0, : len(data)] = data
         trackers = trackers / 4
         
         if self.imputer:
@@ -58,6 +58,10 @@ class Classifier:
         probs = probs[0]
         label = self.labels[np.argmax(probs)]
         return probs, label
+
+    def predict_arrays(self, positions, is_tracked):
+        """Predict the class from an (N, 3) position array, using x, z of the tracked trackers."""
+        return self.predict(positions[is_tracked][:, [0, 2]])
     
     
 if __name__ == "__main__":
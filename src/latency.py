@@ -0,0 +1,175 @@
+import math
+import sys
+import socket
+import struct
+import threading
+import time
+import logging
+
+# kernel receive timestamps, not every Python build exports the constant
+SO_TIMESTAMPNS = getattr(socket, "SO_TIMESTAMPNS", 35 if sys.platform.startswith("linux") else None)
+# the struct timespec of the control message
+_TIMESPEC = struct.Struct("@qq")
+
+
+def enable_kernel_timestamps(sock):
+    """Ask the kernel to stamp every datagram of sock on arrival, True if it will."""
+    if SO_TIMESTAMPNS is None:
+        return False
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, SO_TIMESTAMPNS, 1)
+        return True
+    except (OSError, AttributeError):
+        return False
+
+
+def ancillary_size():
+    """Size of the control buffer recvmsg_into needs for a kernel timestamp."""
+    return socket.CMSG_SPACE(_TIMESPEC.size)
+
+
+def arrival_time(ancdata):
+    """
+    The time.perf_counter time a datagram arrived, from the control messages
+    of recvmsg_into. The kernel stamps with the wall clock, the stamp is moved
+    to perf_counter by their current offset. Without a stamp it is now.
+    """
+    for level, kind, payload in ancdata:
+        if level == socket.SOL_SOCKET and kind == SO_TIMESTAMPNS and len(payload) >= _TIMESPEC.size:
+            seconds, nanoseconds = _TIMESPEC.unpack_from(payload)
+            age = time.time_ns() - (seconds * 1_000_000_000 + nanoseconds)
+            return time.perf_counter() - max(age, 0) * 1e-9
+    return time.perf_counter()
+
+
+class StampedBytes(bytes):
+    """
+    A packet that carries the times it passed the pipeline stages, a list of
+    (stage, time.perf_counter) pairs starting with its arrival.
+    """
+
+    def __new__(cls, data, marks):
+        packet = super().__new__(cls, data)
+        packet.marks = marks
+        return packet
+
+
+class StampedFrame(list):
+    """A frame of tracker dicts with the marks of StampedBytes."""
+
+    def __init__(self, trackers, marks):
+        super().__init__(trackers)
+        self.marks = marks
+
+
+def mark(marks, stage):
+    """Append the current time for stage, marks may be None when nothing is measured."""
+    if marks is not None:
+        marks.append((stage, time.perf_counter()))
+
+
+class LatencyHistogram:
+    """
+    Latencies counted in logarithmic buckets, resolution buckets per
+    doubling from 1 us to about 16 s. Percentiles are the upper bound of
+    their bucket, i.e. at most 2 ** (1 / resolution) too high.
+    """
+
+    def __init__(self, resolution=4, octaves=24):
+        self.resolution = resolution
+        # bucket 0 holds everything below 1 us, bucket i (i > 0) [2 ** ((i - 1) / r), 2 ** (i / r)) us
+        self.counts = [0] * (resolution * octaves + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        microseconds = seconds * 1e6
+        if microseconds < 1.0:
+            index = 0
+        else:
+            index = min(int(math.log2(microseconds) * self.resolution) + 1, len(self.counts) - 1)
+        self.counts[index] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def upper_bound(self, index):
+        return 2 ** (index / self.resolution) * 1e-6
+
+    def percentile(self, q):
+        """Latency in seconds that q percent of the samples do not exceed."""
+        if self.count == 0:
+            return None
+        rank = q / 100 * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= rank:
+                return min(self.upper_bound(index), self.max)
+        return self.max
+
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def summary(self):
+        """count, mean, p50, p90, p99 and max, the times in milliseconds."""
+        if self.count == 0:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "mean": round(self.mean() * 1e3, 3),
+            "p50": round(self.percentile(50) * 1e3, 3),
+            "p90": round(self.percentile(90) * 1e3, 3),
+            "p99": round(self.percentile(99) * 1e3, 3),
+            "max": round(self.max * 1e3, 3),
+        }
+
+    def clear(self):
+        self.counts = [0] * len(self.counts)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+
+class LatencyStats:
+    """
+    One LatencyHistogram per pipeline stage and one for the whole way from
+    arrival to send.
+
+    record_marks takes the marks of a StampedBytes or StampedFrame; the time
+    between two marks is counted for the later stage, e.g. "merge" is the
+    time from the arrival of the oldest packet of a frame until the
+    Synchronizer queued it. Safe to use from several threads.
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self.lock = threading.Lock()
+
+    def record(self, stage, seconds):
+        with self.lock:
+            histogram = self.stages.get(stage)
+            if histogram is None:
+                histogram = self.stages[stage] = LatencyHistogram()
+            histogram.record(seconds)
+
+    def record_marks(self, marks):
+        if len(marks) < 2:
+            return
+        for (_, start), (stage, end) in zip(marks, marks[1:]):
+            self.record(stage, end - start)
+        self.record("total", marks[-1][1] - marks[0][1])
+
+    def summary(self):
+        with self.lock:
+            return {stage: histogram.summary() for stage, histogram in self.stages.items()}
+
+    def log(self):
+        for stage, summary in self.summary().items():
+            logging.info(f"Latency {stage}: {summary}")
+
+    def clear(self):
+        with self.lock:
+            self.stages.clear()
@@ -0,0 +1,55 @@
+import time
+
+from src.latency import LatencyHistogram
+
+
+class PlaybackClock:
+    """
+    Waits for playback deadlines on time.perf_counter_ns.
+
+    Deadlines are offsets in seconds from an origin set by start, so they
+    never accumulate rounding errors and do not move with the wall clock.
+    wait sleeps until spin seconds before the deadline, which the sleep
+    granularity of the OS cannot hit exactly, and spins for the rest,
+    yielding the GIL to the other threads meanwhile. How late each deadline
+    was met is counted in lateness; later than miss_threshold is a miss.
+    """
+
+    def __init__(self, spin=0.0005, miss_threshold=0.001):
+        self.spin_ns = round(spin * 1e9)
+        self.miss_threshold = miss_threshold
+        self.origin = None
+        self.lateness = LatencyHistogram()
+        self.missed = 0
+
+    def start(self, offset=0.0):
+        """Set the origin so that offset seconds are due now."""
+        self.origin = time.perf_counter_ns() - round(offset * 1e9)
+
+    def shift(self, seconds):
+        """Move all deadlines later, e.g. by the time playback was paused."""
+        self.origin += round(seconds * 1e9)
+
+    def wait(self, offset):
+        """Return at offset seconds after the origin, return how late that was."""
+        deadline = self.origin + round(offset * 1e9)
+        remaining = deadline - time.perf_counter_ns()
+        if remaining > self.spin_ns:
+            time.sleep((remaining - self.spin_ns) * 1e-9)
+        now = time.perf_counter_ns()
+        while now < deadline:
+            time.sleep(0)
+            now = time.perf_counter_ns()
+        late = (now - deadline) * 1e-9
+        self.lateness.record(late)
+        if late > self.miss_threshold:
+            self.missed += 1
+        return late
+
+    def stats(self):
+        """Deadlines waited for and missed, and the lateness summary in milliseconds."""
+        return {"waits": self.lateness.count, "missed": self.missed, **self.lateness.summary()}
+
+    def clear(self):
+        self.lateness.clear()
+        self.missed = 0
@@ -0,0 +1,99 @@
+import heapq
+import logging
+import threading
+
+from src.vive_decoder import ViveDecoder
+from src.vive_encoder import ViveEncoder
+
+# first name character of the trackers of the 2nd, 3rd, ... overlaid
+# recording; tracker names are hex, so these never collide with real ones
+OVERLAY_PREFIXES = "GHIJKLMNOPQRSTUVWXYZ"
+
+
+def retag_trackers(packet, prefix, decoder, encoder):
+    """
+    The packet with the first characters of every tracker name replaced by
+    prefix (bytes). Tracking references are dropped, see scan_records.
+    """
+    records = decoder.scan_records(packet)
+    if records is None:
+        return bytes(packet)
+    width = len(prefix)
+    return encoder.encode_records(prefix + bytes(record[width:]) for _, record in records)
+
+
+def overlay_recordings(recordings):
+    """
+    Merge recordings of (timestamp, data) into one, ordered by timestamp, as
+    if all of them had been recorded at once. The trackers of every
+    recording but the first are renamed with OVERLAY_PREFIXES so that each
+    recording adds its own trackers to the crowd.
+    """
+    if len(recordings) > len(OVERLAY_PREFIXES) + 1:
+        raise ValueError(f"At most {len(OVERLAY_PREFIXES) + 1} recordings can be overlaid.")
+    decoder = ViveDecoder()
+    encoder = ViveEncoder()
+    streams = [[(timestamp, bytes(data)) for timestamp, data in recordings[0]]]
+    for prefix, recording in zip(OVERLAY_PREFIXES, recordings[1:]):
+        prefix = prefix.encode("ascii")
+        streams.append(
+            [
+                (timestamp, retag_trackers(data, prefix, decoder, encoder))
+                for timestamp, data in recording
+            ]
+        )
+    return list(heapq.merge(*streams, key=lambda record: record[0]))
+
+
+class Prefetcher:
+    """
+    Opens the next recording of a playlist on a background thread while the
+    current one plays.
+
+    open_recording is called with the path and should do all the slow work
+    (reading, parsing, scanning the index). take returns its result, waiting
+    for the thread if it is not done yet, or opening the file right there if
+    it was never requested.
+    """
+
+    def __init__(self, open_recording):
+        self.open_recording = open_recording
+        self.path = None
+        self.thread = None
+        self.result = None
+
+    def request(self, path):
+        if self.path == path:
+            return
+        self.cancel()
+        self.path = path
+        self.result = None
+        self.thread = threading.Thread(target=self._run, args=(path,), daemon=True)
+        self.thread.start()
+
+    def _run(self, path):
+        try:
+            self.result = self.open_recording(path)
+        except OSError as e:
+            logging.error(f"Could not prefetch {path}: {e}")
+
+    def take(self, path):
+        if self.path != path:
+            self.cancel()
+            return self.open_recording(path)
+        self.thread.join()
+        result = self.result
+        self.path = None
+        self.thread = None
+        self.result = None
+        return result
+
+    def cancel(self):
+        """Drop a prefetched recording that will not be played."""
+        if self.thread is not None:
+            self.thread.join()
+            if hasattr(self.result, "close"):
+                self.result.close()
+        self.path = None
+        self.thread = None
+        self.result = None
@@ -1,10 +1,11 @@
 import threading
 import logging
-from src.vive_decoder import ViveDecoder
+from src.vive_decoder import ViveDecoder, ViveTrackerArrays, ViveTrackerTable
 from src.vive_encoder import ViveEncoder
 from src.vive_blobber import ViveBlobber
 from src.vive_augmentor import ViveAugmentor
 from src.classifier import Classifier
+from src.latency import mark
 
 class Processor:
 
@@ -31,24 +32,53 @@ class Processor:
         self.detect_blobs = True
         self.debug = False
         self.augment_data = True
+        # decode, augment, blob and encode on arrays instead of tracker dicts
+        self.use_arrays = bool(config.get("array_pipeline", False)) if config else False
+        # the trackers of the packets the array path decodes in place
+        self.table = ViveTrackerTable()
+        # packets of frames processed before, see set_replay_cache
+        self.replay_cache = None
+        self.vis = None
     
     def set_radius(self, radius):
+        if radius != self.blobber.radius:
+            self.invalidate_cache()
         self.blobber.radius = radius
     
     def set_num_augmentations(self, num_augmentations):
+        if num_augmentations != self.num_augmentations:
+            self.invalidate_cache()
         self.num_augmentations = num_augmentations
 
     def set_augment_data(self, augment_data):
+        if augment_data != self.augment_data:
+            self.invalidate_cache()
         self.augment_data = augment_data
         
     def set_ignore_vive_tracker_names(self, ignored_vive_tracker_names):
         self.decoder.set_ignored_vive_tracker_names(ignored_vive_tracker_names)
+        self.invalidate_cache()
 
     def set_debug(self, debug):
         self.debug = debug
         
     def set_bypass(self, bypass):
         self.bypass = bypass
+
+    def set_use_arrays(self, use_arrays):
+        self.use_arrays = use_arrays
+
+    def set_replay_cache(self, replay_cache):
+        """
+        Look up the packets of frames seen before in a ReplayCache instead of
+        processing them again, e.g. for a recording played in a loop.
+        """
+        self.replay_cache = replay_cache
+
+    def invalidate_cache(self):
+        """Forget the cached packets, they were processed with other settings."""
+        if self.replay_cache is not None:
+            self.replay_cache.clear()
     
     def start(self):
         if self.running:
@@ -76,15 +106,58 @@ class Processor:
         if data is None:
             return
 
+        self.process_data(data)
+
+    def process_data(self, data):
+        """Process one packet or frame and hand the result to the callback."""
+        # a list of tracker dicts is a frame handed over in-process (see
+        # Synchronizer.set_frame_mode), it is only encoded on the way out
+        is_frame = isinstance(data, list)
+        # stage times of a stamped frame, see src.latency
+        marks = getattr(data, "marks", None)
+        mark(marks, "dequeue")
+
+        key = None
+        if self.replay_cache is not None and not self.bypass:
+            # only frames the Synchronizer keyed are worth caching, see KeyedFrame
+            key = getattr(data, "key", None)
+            entry = self.replay_cache.get(key) if key is not None else None
+            if entry is not None:
+                mark(marks, "cached")
+                self.send_cached(*entry, marks)
+                return
+        if is_frame and getattr(data, "records", None) is not None:
+            # the Synchronizer left the trackers of a cached frame out, but
+            # the cached packet is bypassed or was cleared in the meantime
+            data = self.decoder.decode_records(data.records)
+        # what the visualizer is given for this frame, kept for the replay cache
+        self.vis = None
+
         if self.debug:
-            logging.info(f"Got: {len(data)} bytes")
+            if is_frame:
+                logging.info(f"Got: {len(data)} trackers")
+            else:
+                logging.info(f"Got: {len(data)} bytes")
 
-        if not self.bypass:
+        if self.bypass and is_frame:
+            self.encoder.blobs = []
+            self.encoder.vive_trackers = data
+            data = self.encoder.encode_view()
+            mark(marks, "encode")
+        elif not self.bypass and self.use_arrays:
+            data = self.process_arrays(data, marks)
+            if data is None:
+                return None
+        elif not self.bypass:
             # to avoid freezing the UI we use a timeout on the queue get which can lead to None data
 
             # decode the data (find the trackers)
-            self.decoder.decode(data)
-            tracker_data = self.decoder.vive_trackers
+            if is_frame:
+                tracker_data = self.decoder.filter(data)
+            else:
+                self.decoder.decode(data)
+                tracker_data = self.decoder.vive_trackers
+            mark(marks, "decode")
             
             if tracker_data is None or len(tracker_data) == 0:
                 logging.warning("No trackers found in the decoded data.")
@@ -103,6 +176,7 @@ class Processor:
             # detect the blobs
             blobs, tracker_data = self.blobber.process_data(tracker_data)
             self.encoder.blobs = blobs
+            mark(marks, "process")
             if self.debug and len(blobs) > 0:
                 dbg_str = "Blobs:\n"
                 for i, blob in enumerate(blobs):
@@ -126,9 +200,10 @@ class Processor:
                     dbg_str += f",{tracker['position'][2]:.2f})\n"
                 logging.info(dbg_str)
 
-            # encode the data
+            # encode the data (the view is only valid until the next encode)
             self.encoder.vive_trackers = tracker_data
-            data = self.encoder.encode()
+            data = self.encoder.encode_view()
+            mark(marks, "encode")
             
             # classify the data
             if self.classifier:
@@ -143,15 +218,83 @@ class Processor:
                     probs, label = self.classifier.predict(trackers)
                     logging.info(f"Class: {label} ({probs})")
 
-            if self.callback_vis:
-                self.callback_vis(blobs, tracker_data)
+            self.visualize(blobs, tracker_data)
                 
+        if key is not None:
+            self.replay_cache.put(key, bytes(data), self.vis)
+
         if self.debug:
             logging.info(f"Sent: {len(data)} bytes\n")
 
-        # send the data out
+        # send the data out, the sender closes the marks
+        if self.callback:
+            if marks is None:
+                self.callback(data)
+            else:
+                self.callback(data, marks)
+
+    def visualize(self, blobs, tracker_data):
+        """Hand the blobs and tracker dicts of a processed frame to the visualizer."""
+        if self.callback_vis:
+            self.vis = (blobs, tracker_data)
+            self.callback_vis(blobs, tracker_data)
+
+    def send_cached(self, packet, vis, marks):
+        """Send a packet from the replay cache, the visualizer gets what it got the first time."""
+        if self.callback_vis and vis is not None:
+            self.callback_vis(*vis)
         if self.callback:
-            self.callback(data)
+            if marks is None:
+                self.callback(packet)
+            else:
+                self.callback(packet, marks)
+
+    def process_arrays(self, data, marks=None):
+        """
+        Array counterpart of the processing in process(), no tracker dicts are
+        built unless a visualizer callback is set. data is a packet or a list
+        of tracker dicts, marks the stage times of a stamped one.
+
+        Returns the encoded packet (valid until the next encode) or None.
+        """
+        if isinstance(data, list):
+            frame = ViveTrackerArrays.from_dicts(self.decoder.filter(data))
+        elif self.decoder.decode_into(data, self.table) is None:
+            frame = None
+        else:
+            # views into the table, used up before the next packet is decoded
+            frame = self.table.frame()
+        mark(marks, "decode")
+
+        if frame is None or len(frame) == 0:
+            logging.warning("No trackers found in the decoded data.")
+            return None
+
+        # augment the data
+        if self.augment_data:
+            frame = self.augmentor.augment_arrays(frame, self.num_augmentations)
+
+        if frame is None:
+            logging.warning("No devices found in the decoded data.")
+            return None
+
+        # detect the blobs
+        blobs, blob_ids = self.blobber.process_arrays(frame.positions, frame.is_tracked)
+        mark(marks, "process")
+        if self.debug:
+            logging.info(f"Blobs: {len(blobs)} Trackers: {len(frame)}")
+
+        # encode the data
+        data = self.encoder.encode_arrays(frame, blobs, blob_ids)
+        mark(marks, "encode")
+
+        if self.callback_vis:
+            tracker_data = frame.to_dicts()
+            for tracker, blob_id in zip(tracker_data, blob_ids.tolist()):
+                tracker["blob_id"] = blob_id
+            self.visualize(blobs, tracker_data)
+
+        return data
 
     def run(self):
         while self.running:
@@ -2,6 +2,7 @@ import logging
 import time
 import struct
 import threading
+import queue
 
 
 class Recorder:
@@ -11,34 +12,68 @@ class Recorder:
     after recording is done, the data is saved to a file in the specified format
     additionally, the received data can be sent to a remote host (bypass)
     the player class can then playback the data in a loop
+
+    the recording thread sleeps on an event while not recording and blocks
+    on its input while recording, so it uses no CPU when idle. the input is
+    either polled from callback_data or pushed with update (e.g. as the
+    callback of a UDPReceiverQ) into the recorder's own queue
     """
 
-    def __init__(self, callback_data, callback=None):
+    def __init__(self, callback_data=None, callback=None, channel=None):
         self.recording = False
         self.data = []
         self.callback = callback
-        self.callback_data = callback_data
+        # see src.channels.make_channel
+        self.queue = channel if channel is not None else queue.Queue()
+        self.callback_data = callback_data if callback_data is not None else self.get_data_block
         self.start_time = None
+        self._start_counter = None
         self.killme = False
+        # set while recording or closing, the thread waits for it
+        self.active = threading.Event()
         self.thread = threading.Thread(target=self.record_loop, daemon=True)
         self.thread.start()
 
     def start(self):
         logging.info("Recorder started.")
-        self.recording = True
-        self.start_time = time.time()
+        # packets and wake-ups left over from the last recording
+        while not self.queue.empty():
+            self.queue.get_nowait()
         self.data = []
+        self.start_time = time.time()
+        self._start_counter = time.perf_counter()
+        self.recording = True
+        self.active.set()
         return True
 
     def stop(self):
         logging.info("Recorder stopped.")
         self.recording = False
+        self.active.clear()
+        self._wake()
+
+    def update(self, data):
+        """Push a packet to record, packets pushed while not recording are dropped."""
+        if self.recording:
+            self.queue.put(data)
+
+    def get_data_block(self, timeout=None):
+        """Block until a pushed packet arrives, None when woken by stop or close."""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def _wake(self):
+        # a thread blocked in get_data_block returns on the None
+        if self.callback_data == self.get_data_block:
+            self.queue.put(None)
 
     def record(self):
         data = self.callback_data()
-        if data is None:
+        if data is None or not self.recording:
             return
-        time_diff = time.time() - self.start_time
+        time_diff = time.perf_counter() - self._start_counter
         self.data.append((time_diff, data))
         if self.callback:
             try:
@@ -48,10 +83,11 @@ class Recorder:
                 self.stop()
 
     def record_loop(self):
-        while not self.killme:
-            if self.recording:
-                self.record()
-            time.sleep(0.000000001)
+        while True:
+            self.active.wait()
+            if self.killme:
+                return
+            self.record()
 
     def save(self, file_path):
         file_type = file_path.split(".")[-1]
@@ -87,10 +123,14 @@ class Recorder:
 
     def close(self):
         self.killme = True
+        self.recording = False
+        self.active.set()
+        self._wake()
+        if self.thread is not threading.current_thread():
+            self.thread.join()
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self.killme = True
-        self.thread.join()
+        self.close()
 
 
 if __name__ == "__main__":
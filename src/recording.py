@@ -0,0 +1,358 @@
+import logging
+import mmap
+import os
+import struct
+
+import numpy as np
+
+from src.vive_decoder import TRACKER_DTYPE
+
+_RECORD_HEADER = struct.Struct("<fI")
+
+
+def read_bin(file_path):
+    """Read the raw bytes of a .bin recording, or None if it does not exist."""
+    if not os.path.exists(file_path):
+        logging.error(f"File not found: {file_path}")
+        return None
+    with open(file_path, "rb") as f:
+        return f.read()
+
+
+def scan_bin(buffer):
+    """
+    Parse the record headers of a .bin recording without copying the payloads.
+
+    Args:
+        buffer: The content of the recording (bytes, mmap, memoryview).
+
+    Returns:
+        Three numpy arrays: the timestamp of each record and the start and end
+        offsets of its payload in buffer.
+    """
+    timestamps = []
+    starts = []
+    ends = []
+    size = len(buffer)
+    if size < _RECORD_HEADER.size:
+        logging.error("File is empty or corrupted.")
+    else:
+        # Read the header
+        start_time, length = _RECORD_HEADER.unpack_from(buffer, 0)
+        index = _RECORD_HEADER.size
+        if length != 0:
+            logging.warning(
+                "File might be old and recording time is wrong. Interpreting header as data...."
+            )
+            index += length
+        logging.info(f"Recording time: {start_time}")
+
+        unpack = _RECORD_HEADER.unpack_from
+        while index + _RECORD_HEADER.size <= size:
+            timestamp, length = unpack(buffer, index)
+            index += _RECORD_HEADER.size
+            timestamps.append(timestamp)
+            starts.append(index)
+            index = min(index + length, size)
+            ends.append(index)
+        logging.info("End of file reached.")
+
+    return (
+        np.array(timestamps, dtype=np.float64),
+        np.array(starts, dtype=np.intp),
+        np.array(ends, dtype=np.intp),
+    )
+
+
+def index_bin(file_path, buffer=None):
+    """
+    The scan_bin arrays of a .bin recording, from its sidecar index file
+    (file_path + ".idx") when that matches the recording and else scanned
+    from buffer (or the file) and stored as the sidecar for next time.
+    Returns None if the recording does not exist.
+    """
+    if not os.path.exists(file_path):
+        logging.error(f"File not found: {file_path}")
+        return None
+    stat = os.stat(file_path)
+    sidecar = file_path + ".idx"
+    try:
+        with np.load(sidecar) as index:
+            if index["size"] == stat.st_size and index["mtime"] == stat.st_mtime_ns:
+                return index["timestamps"], index["starts"], index["ends"]
+    except (OSError, KeyError, ValueError):
+        pass
+
+    if buffer is None:
+        buffer = read_bin(file_path)
+    timestamps, starts, ends = scan_bin(buffer)
+    try:
+        with open(sidecar, "wb") as f:
+            np.savez(
+                f,
+                size=stat.st_size,
+                mtime=stat.st_mtime_ns,
+                timestamps=timestamps,
+                starts=starts,
+                ends=ends,
+            )
+    except OSError as e:
+        logging.warning(f"Could not write the index {sidecar}: {e}")
+    return timestamps, starts, ends
+
+
+def load_from_bin(file_path):
+    """Read a .bin recording into a list of (timestamp, data) tuples."""
+    buffer = read_bin(file_path)
+    if buffer is None:
+        return None
+    timestamps, starts, ends = scan_bin(buffer)
+    return [
+        (timestamp, buffer[start:end])
+        for timestamp, start, end in zip(timestamps.tolist(), starts.tolist(), ends.tolist())
+    ]
+
+
+class BinRecording:
+    """
+    A .bin recording read through mmap while it is played.
+
+    Opening maps the file and reads its header, nothing else. Iterating
+    parses one record header after the other and yields (timestamp, data)
+    with data a memoryview into the map, valid until close(). The map is
+    read sequentially, so the kernel can drop pages that were already
+    played and resident memory does not grow with the recording.
+
+    Seeking with records(position) needs the record offsets, they are only
+    scanned (or read from the sidecar, see index_bin) when first asked for.
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.file = open(file_path, "rb")
+        self.mmap = None
+        self.view = memoryview(b"")
+        self.start_time = None
+        self.data_start = 0
+        self._index = None
+        if os.fstat(self.file.fileno()).st_size < _RECORD_HEADER.size:
+            logging.error("File is empty or corrupted.")
+            return
+        self.mmap = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        if hasattr(self.mmap, "madvise"):
+            self.mmap.madvise(mmap.MADV_SEQUENTIAL)
+        self.view = memoryview(self.mmap)
+        # Read the header
+        self.start_time, length = _RECORD_HEADER.unpack_from(self.view, 0)
+        self.data_start = _RECORD_HEADER.size
+        if length != 0:
+            logging.warning(
+                "File might be old and recording time is wrong. Interpreting header as data...."
+            )
+            self.data_start += length
+        logging.info(f"Recording time: {self.start_time}")
+
+    def __iter__(self):
+        return self.records()
+
+    def __len__(self):
+        return len(self.index()[0])
+
+    def index(self):
+        """The scan_bin arrays of the recording, see index_bin."""
+        if self._index is None:
+            self._index = index_bin(self.file_path, self.view)
+        return self._index
+
+    def records(self, position=0):
+        """Iterate the records from record number position on."""
+        view = self.view
+        size = len(view)
+        if position == 0:
+            index = self.data_start
+        else:
+            starts = self.index()[1]
+            if position >= len(starts):
+                return
+            index = int(starts[position]) - _RECORD_HEADER.size
+        unpack = _RECORD_HEADER.unpack_from
+        while index + _RECORD_HEADER.size <= size:
+            timestamp, length = unpack(view, index)
+            index += _RECORD_HEADER.size
+            end = min(index + length, size)
+            yield timestamp, view[index:end]
+            index = end
+
+    def __bool__(self):
+        return len(self.view) - self.data_start >= _RECORD_HEADER.size
+
+    def close(self):
+        self.view.release()
+        self.view = memoryview(b"")
+        if self.mmap is not None:
+            try:
+                self.mmap.close()
+            except BufferError:
+                # payloads are still referenced downstream, the map goes with them
+                logging.debug("Recording still in use, leaving the map to be collected.")
+            self.mmap = None
+        self.file.close()
+
+
+def open_bin(file_path):
+    """Map a .bin recording for streaming playback, or None if it does not exist."""
+    if not os.path.exists(file_path):
+        logging.error(f"File not found: {file_path}")
+        return None
+    return BinRecording(file_path)
+
+
+class RecordingArrays:
+    """
+    A recording decoded into dense (frames x trackers) arrays.
+
+    timestamps has shape (F,), positions (F, T, 3) and rotations (F, T, 4);
+    status, tracked, tracking_result and present have shape (F, T). Trackers
+    missing from a frame have NaN positions and rotations and present False.
+    names lists the T trackers in order of first appearance and index maps a
+    name to its column.
+    """
+
+    def __init__(
+        self,
+        timestamps,
+        names,
+        positions,
+        rotations,
+        status,
+        tracked,
+        tracking_result,
+        present,
+    ):
+        self.timestamps = timestamps
+        self.names = names
+        self.index = {name: column for column, name in enumerate(names)}
+        self.positions = positions
+        self.rotations = rotations
+        self.status = status
+        self.tracked = tracked
+        self.tracking_result = tracking_result
+        self.present = present
+
+    def __len__(self):
+        return len(self.timestamps)
+
+
+def decode_recording(
+    recording, ignored_vive_tracker_names=(), ignore_tracking_reference=True, label=2222
+):
+    """
+    Decode a whole .bin recording into a RecordingArrays in one pass.
+
+    Headers are scanned once, then all tracker records of all packets are
+    gathered into a single TRACKER_DTYPE array and scattered into the
+    (frames x trackers) tables. Only packets containing class 2 devices
+    (88-byte records) are walked record by record to find their offsets.
+    Packets with another label are skipped; ignored trackers and tracking
+    references are dropped as in ViveDecoder.decode.
+
+    Args:
+        recording: Path to the .bin file or its content.
+        ignored_vive_tracker_names: Names of the trackers to drop.
+
+    Returns:
+        A RecordingArrays, or None if the file does not exist.
+    """
+    buffer = read_bin(recording) if isinstance(recording, str) else recording
+    if buffer is None:
+        return None
+
+    timestamps, starts, ends = scan_bin(buffer)
+    raw = np.frombuffer(buffer, dtype=np.uint8)
+
+    # keep the packets carrying tracker data
+    valid = np.flatnonzero(ends - starts > 2)
+    packet_labels = raw[starts[valid]].astype(np.intp) | (
+        raw[starts[valid] + 1].astype(np.intp) << 8
+    )
+    valid = valid[packet_labels == label]
+    timestamps = timestamps[valid]
+    starts = starts[valid]
+    ends = ends[valid]
+    num_frames = len(valid)
+
+    # record offsets assuming 40-byte records everywhere
+    counts = raw[starts + 2].astype(np.intp)
+    frame_of_record = np.repeat(np.arange(num_frames), counts)
+    first_record = np.cumsum(counts) - counts
+    offsets = (
+        starts[frame_of_record]
+        + 3
+        + 40 * (np.arange(len(frame_of_record)) - first_record[frame_of_record])
+    )
+
+    # walk the packets that do not fit that assumption
+    needs_walk = starts + 3 + 40 * counts > ends
+    device_class = raw[np.minimum(offsets + 8, len(raw) - 1)]
+    needs_walk[frame_of_record[device_class == 2]] = True
+    bad_record = np.zeros(len(offsets), dtype=bool)
+    for frame in np.flatnonzero(needs_walk).tolist():
+        first = first_record[frame]
+        index = starts[frame] + 3
+        for record in range(first, first + counts[frame]):
+            offsets[record] = index
+            index += 88 if index + 8 < ends[frame] and raw[index + 8] == 2 else 40
+        if index > ends[frame]:
+            logging.warning(f"Skipping truncated packet at {timestamps[frame]}s.")
+            bad_record[first : first + counts[frame]] = True
+
+    keep = ~bad_record
+    offsets = offsets[keep]
+    frame_of_record = frame_of_record[keep]
+
+    # gather all records at once
+    windows = np.lib.stride_tricks.sliding_window_view(raw, TRACKER_DTYPE.itemsize)
+    records = windows[offsets].view(TRACKER_DTYPE).reshape(-1)
+
+    if ignore_tracking_reference:
+        keep = records["device_class"] != 4
+        if ignored_vive_tracker_names:
+            ignored = [name.encode("utf-8") for name in ignored_vive_tracker_names]
+            lower = np.char.lower(records["name"])
+            keep &= ~np.isin(lower, [name.lower() for name in ignored])
+        records = records[keep]
+        frame_of_record = frame_of_record[keep]
+
+    # one column per tracker, in order of first appearance
+    unique_names, first_seen, inverse = np.unique(
+        records["name"], return_index=True, return_inverse=True
+    )
+    order = np.argsort(first_seen)
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    column = rank[inverse.reshape(-1)]
+    names = [name.decode("utf-8") for name in unique_names[order].tolist()]
+
+    shape = (num_frames, len(names))
+    positions = np.full(shape + (3,), np.nan, dtype=np.float32)
+    rotations = np.full(shape + (4,), np.nan, dtype=np.float32)
+    flags = np.zeros(shape, dtype=np.uint8)
+    tracking_result = np.zeros(shape, dtype=np.uint8)
+    present = np.zeros(shape, dtype=bool)
+
+    positions[frame_of_record, column] = records["position"]
+    rotations[frame_of_record, column] = records["rotation"]
+    flags[frame_of_record, column] = records["flags"]
+    tracking_result[frame_of_record, column] = records["tracking_result"]
+    present[frame_of_record, column] = True
+
+    return RecordingArrays(
+        timestamps=timestamps,
+        names=names,
+        positions=positions,
+        rotations=rotations,
+        status=(flags & (1 << 0)) != 0,
+        tracked=(flags & (1 << 1)) != 0,
+        tracking_result=tracking_result,
+        present=present,
+    )
@@ -0,0 +1,91 @@
+import logging
+
+
+class KeyedFrame(list):
+    """
+    A frame of tracker dicts that carries its ReplayCache key. A frame that
+    was cached when it was merged comes without trackers but with the
+    (raw name, record) pairs they are decoded from, in case the packet is
+    not used after all (bypass, or the cache was cleared in between).
+    """
+
+    def __init__(self, trackers, key, records=None):
+        super().__init__(trackers)
+        self.key = key
+        self.records = records
+
+
+class KeyedBytes(bytes):
+    """A packet that may be looked up in a ReplayCache, its key is the packet itself."""
+
+    def __new__(cls, data, key):
+        packet = super().__new__(cls, data)
+        packet.key = key
+        return packet
+
+
+# rough size of the (blobs, tracker dicts) kept for the visualizer, per tracker
+VIS_BYTES_PER_TRACKER = 1024
+
+
+class ReplayCache:
+    """
+    The processed packets of frames that were seen before.
+
+    A frame is keyed by its raw tracker records, so a recording played in a
+    loop is decoded, augmented, blobbed and encoded on the first pass only;
+    later passes look the packets up. Next to the packet an entry keeps what
+    the visualizer was given for the frame, (blobs, tracker dicts) or None,
+    since the packet cannot be decoded back into it.
+
+    Once about max_bytes are stored new frames are no longer added, which
+    keeps the start of a too long loop cached instead of evicting every
+    frame before it comes round again.
+
+    The packets depend on the processing settings, the Processor clears the
+    cache whenever one of them changes.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.entries = {}
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def get(self, key):
+        """The (packet, vis) entry of key, None if it is not cached."""
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def put(self, key, packet, vis=None):
+        size = len(key) + len(packet)
+        if vis is not None:
+            size += len(vis[1]) * VIS_BYTES_PER_TRACKER
+        if key not in self.entries and self.size + size <= self.max_bytes:
+            self.entries[key] = (packet, vis)
+            self.size += size
+
+    def clear(self):
+        if self.entries:
+            logging.info(f"Replay cache cleared ({len(self.entries)} frames).")
+        self.entries = {}
+        self.size = 0
+
+    def stats(self):
+        return {
+            "frames": len(self.entries),
+            "bytes": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
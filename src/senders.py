@@ -3,14 +3,18 @@ import socket
 import threading
 import logging
 import queue
+import time
 
 
 class UDPSenderQ:
-    def __init__(self, ip="127.0.0.1", port=2223, debug=False):
+    def __init__(self, ip="127.0.0.1", port=2223, debug=False, channel=None, latency=None):
         self.port = port
+        # a src.latency.LatencyStats that the marks of stamped packets are counted in
+        self.latency = latency
         self.running = False
         self.sock = None
-        self.queue = queue.Queue()
+        # see src.channels.make_channel
+        self.queue = channel if channel is not None else queue.Queue()
         self.thread = None
         self.debug = debug
         if type(ip) is str:
@@ -32,19 +36,41 @@ class UDPSenderQ:
     def send_data(self):
         while self.is_running():
             try:
-                data = self.queue.get(timeout=0.1)
+                data, marks = self.queue.get(timeout=0.1)
                 if self.debug:
                     logging.info(f"Sending data: {data}")
                 for ip in self.ip:
                     self.sock.sendto(data, (ip, self.port))
+                self.record(marks)
             except queue.Empty:
                 continue
             except socket.error as e:
                 logging.error(f"Socket error while sending data: {e}")
                 self.stop()
 
-    def update(self, data):
-        self.queue.put(data)
+    def send(self, data, marks=None):
+        """Send data right away from the calling thread, e.g. a ViveEncoder.encode_view."""
+        try:
+            if self.debug:
+                logging.info(f"Sending data: {data}")
+            for ip in self.ip:
+                self.sock.sendto(data, (ip, self.port))
+            self.record(marks)
+        except socket.error as e:
+            logging.error(f"Socket error while sending data: {e}")
+
+    def update(self, data, marks=None):
+        """Queue data for the sender thread, marks are the stage times of a stamped packet."""
+        if isinstance(data, memoryview):
+            # views into reused buffers are only valid until the caller moves on
+            data = data.tobytes()
+        self.queue.put((data, marks))
+
+    def record(self, marks):
+        """Close the marks of a sent packet and count them in the latency stats."""
+        if self.latency is not None and marks:
+            marks.append(("send", time.perf_counter()))
+            self.latency.record_marks(marks)
 
     def start(self):
         if self.is_running():
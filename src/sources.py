@@ -4,11 +4,39 @@ import time
 import logging
 import queue
 import os
-import struct
+import math
+import select
+import selectors
+import functools
+import collections
+import itertools
 from abc import ABC, abstractmethod
 
+import numpy as np
+
 from src.vive_decoder import ViveDecoder
 from src.vive_encoder import ViveEncoder
+from src.recording import BinRecording, load_from_bin, open_bin
+from src.tracker_store import TrackerStore
+from src.buffer_pool import BufferPool
+from src.playback_clock import PlaybackClock
+from src.replay_cache import KeyedFrame, KeyedBytes
+from src.playlist import Prefetcher, overlay_recordings
+from src.latency import (
+    StampedBytes,
+    StampedFrame,
+    enable_kernel_timestamps,
+    ancillary_size,
+    arrival_time,
+)
+from src.udp_stats import (
+    set_receive_buffer,
+    receive_buffer,
+    enable_drop_counter,
+    drop_counter_size,
+    drop_count,
+    proc_net_udp_drops,
+)
 
 
 class DataSource(ABC):
@@ -26,16 +54,62 @@ class DataSource(ABC):
 
 
 class UDPReceiverQ(DataSource):
-    def __init__(self, ip="", port=2222, callback=None):
+    """
+    Receives datagrams on a background thread and queues them or hands them
+    to callback.
+
+    The thread sleeps in select until the socket is readable (or stop wakes
+    it) and then drains every pending datagram with recvfrom_into before it
+    sleeps again. With a pool_size the datagrams are received into a
+    BufferPool and handed out as memoryviews that the consumer must give
+    back with release() once they are done with it, e.g. through
+    Synchronizer.add_source; while the pool is exhausted datagrams are
+    copied to bytes instead. Without a pool each datagram is copied to
+    bytes.
+
+    With timestamps the callback is called as callback(data, timestamp) with
+    the time.perf_counter time the datagram arrived, taken by the kernel
+    (SO_TIMESTAMPNS) where it supports it and when it was received otherwise.
+
+    rcvbuf requests a kernel receive buffer of that many bytes, enough for
+    the bursts of all senders while the thread is held up. stats() reports
+    the buffer the kernel granted and how many datagrams it dropped because
+    the buffer was full.
+    """
+
+    def __init__(
+        self,
+        ip="",
+        port=2222,
+        callback=None,
+        pool_size=0,
+        channel=None,
+        timestamps=False,
+        rcvbuf=None,
+    ):
         self.ip = ip
         self.port = port
         self.buffer_size = 1460
-        self.data_queue = queue.Queue()
+        # see src.channels.make_channel
+        self.data_queue = channel if channel is not None else queue.Queue()
         self.running = False
         self.thread = None
         self.sock = None
         self._is_connected = False
         self.callback = callback
+        self.pool = BufferPool(pool_size, self.buffer_size) if pool_size else None
+        self._scratch = memoryview(bytearray(self.buffer_size))
+        self.timestamps = timestamps
+        self.kernel_timestamps = False
+        self.rcvbuf = rcvbuf
+        self.effective_rcvbuf = None
+        # drops reported with SO_RXQ_OVFL, /proc/net/udp is read without it
+        self.drop_counter = False
+        self.kernel_drops = 0
+        self.received = 0
+        # written to by stop() to wake the thread out of select
+        self._wake_reader = None
+        self._wake_writer = None
 
     def start(self):
         if self.is_running():
@@ -56,7 +130,8 @@ class UDPReceiverQ(DataSource):
     def stop(self):
         """Stop the receiver thread."""
         self.running = False
-        if self.thread:
+        self._wake()
+        if self.thread and self.thread is not threading.current_thread():
             self.thread.join()
         logging.info("Receiver stopped.")
 
@@ -65,6 +140,12 @@ class UDPReceiverQ(DataSource):
         if self.sock:
             self.sock.close()
             self.sock = None
+            self._is_connected = False
+        if self._wake_reader:
+            self._wake_reader.close()
+            self._wake_writer.close()
+            self._wake_reader = None
+            self._wake_writer = None
         logging.info("Receiver closed.")
 
     def is_running(self):
@@ -82,7 +163,24 @@ class UDPReceiverQ(DataSource):
             self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
             self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
             self.sock.bind((self.ip, self.port))
-            self.sock.settimeout(0.1)
+            self.sock.setblocking(False)
+            if self.rcvbuf:
+                self.effective_rcvbuf = set_receive_buffer(self.sock, self.rcvbuf)
+                if self.effective_rcvbuf < self.rcvbuf:
+                    logging.warning(
+                        f"Receive buffer of {self.rcvbuf} bytes requested, got "
+                        f"{self.effective_rcvbuf} (see net.core.rmem_max)."
+                    )
+            else:
+                self.effective_rcvbuf = receive_buffer(self.sock)
+            self.drop_counter = enable_drop_counter(self.sock)
+            self.kernel_drops = 0
+            if self.timestamps:
+                self.kernel_timestamps = enable_kernel_timestamps(self.sock)
+                if not self.kernel_timestamps:
+                    logging.info("No kernel receive timestamps, stamping on receive.")
+            self._wake_reader, self._wake_writer = socket.socketpair()
+            self._wake_reader.setblocking(False)
             logging.info(f"Receiver connected to {self.ip}:{self.port}.")
             self._is_connected = True
             return True
@@ -90,19 +188,100 @@ class UDPReceiverQ(DataSource):
             logging.error(f"Socket error while connecting: {e}")
             return False
 
+    def _wake(self):
+        if self._wake_writer:
+            try:
+                self._wake_writer.send(b"\0")
+            except socket.error:
+                pass
+
     def handle_data(self):
         while self.running:
             try:
-                data, addr = self.sock.recvfrom(self.buffer_size)
-                if self.callback:
-                    self.callback(data)
+                readable, _, _ = select.select([self.sock, self._wake_reader], [], [])
+                if self._wake_reader in readable:
+                    try:
+                        self._wake_reader.recv(64)
+                    except BlockingIOError:
+                        pass
+                if self.sock in readable:
+                    self.received += self.drain()
+            except (socket.error, ValueError) as e:
+                # ValueError: the socket was closed under select
+                if self.running:
+                    logging.error(f"Socket error while receiving data: {e}")
+                self.running = False
+
+    def drain(self):
+        """Receive every pending datagram, return how many there were."""
+        sock = self.sock
+        pool = self.pool
+        scratch = self._scratch
+        timestamps = self.timestamps
+        kernel_timestamps = self.kernel_timestamps
+        drop_counter = self.drop_counter
+        ancillary = (ancillary_size() if kernel_timestamps else 0) + (
+            drop_counter_size() if drop_counter else 0
+        )
+        count = 0
+        # a sender that never pauses must not keep a stopped receiver busy
+        while self.running:
+            buffer = pool.acquire() if pool else None
+            try:
+                if ancillary:
+                    size, ancdata, _, addr = sock.recvmsg_into(
+                        [buffer if buffer is not None else scratch], ancillary
+                    )
+                    if drop_counter:
+                        # the total so far, only present once something was dropped
+                        dropped = drop_count(ancdata)
+                        if dropped is not None:
+                            self.kernel_drops = dropped
                 else:
-                    self.data_queue.put(data)
-            except socket.timeout:
-                continue
-            except socket.error as e:
-                logging.error(f"Socket error while receiving data: {e}")
-                self.stop()
+                    size, addr = sock.recvfrom_into(buffer if buffer is not None else scratch)
+            except BlockingIOError:
+                if buffer is not None:
+                    pool.release(buffer)
+                return count
+            if buffer is not None:
+                data = memoryview(buffer)[:size]
+            else:
+                data = scratch[:size].tobytes()
+            if self.callback:
+                if kernel_timestamps:
+                    self.callback(data, arrival_time(ancdata))
+                elif timestamps:
+                    self.callback(data, time.perf_counter())
+                else:
+                    self.callback(data)
+            else:
+                self.data_queue.put(data)
+            count += 1
+        return count
+
+    def stats(self):
+        """
+        Datagrams received and dropped by the kernel, the effective receive
+        buffer in bytes and the pool misses. dropped is None where the
+        platform does not tell.
+        """
+        if self.drop_counter:
+            dropped = self.kernel_drops
+        elif self.sock:
+            dropped = proc_net_udp_drops(self.sock)
+        else:
+            dropped = None
+        return {
+            "received": self.received,
+            "dropped": dropped,
+            "rcvbuf": self.effective_rcvbuf,
+            "pool_misses": self.pool.misses if self.pool else 0,
+        }
+
+    def release(self, data):
+        """Give a received memoryview back to the pool; bytes are ignored."""
+        if self.pool is not None and isinstance(data, memoryview):
+            self.pool.release(data.obj)
 
     def get_data_block(self, timeout=0.1):
         try:
@@ -120,19 +299,309 @@ class UDPReceiverQ(DataSource):
         self.close()
 
 
+# a datagram of a MultiUDPReceiverQ: the payload, the name of the source it is
+# merged as, the (ip, port) it came from, the local port it arrived on and its
+# time.perf_counter arrival time (see src.latency.arrival_time)
+Datagram = collections.namedtuple("Datagram", ["data", "source", "address", "port", "timestamp"])
+
+
+class MultiUDPReceiverQ(DataSource):
+    """
+    Receives on several sockets from a single thread.
+
+    endpoints is a list of (ip, port) pairs. All sockets are registered with
+    one selector, so adding tracking PCs or ports adds neither threads nor
+    polling. Each datagram is handed to callback (or queued) as a Datagram.
+    Its source is the "ip:port" of the endpoint it arrived on, or with
+    source_by="sender" the address of the sender, so that several PCs
+    sending to the same port are merged as separate sources (see
+    Synchronizer.push_datagram).
+
+    The timestamp of a Datagram is taken when it is received, or with
+    timestamps by the kernel where every socket supports it. pool_size,
+    release, rcvbuf and stats() are those of UDPReceiverQ, the receive
+    buffer per socket and the stats summed up.
+    """
+
+    def __init__(
+        self,
+        endpoints,
+        callback=None,
+        channel=None,
+        source_by="endpoint",
+        pool_size=0,
+        timestamps=False,
+        rcvbuf=None,
+    ):
+        if source_by not in ("endpoint", "sender"):
+            raise ValueError(f"Invalid source_by: {source_by}")
+        self.endpoints = [(ip, port) for ip, port in endpoints]
+        self.callback = callback
+        self.source_by = source_by
+        self.buffer_size = 1460
+        # see src.channels.make_channel
+        self.data_queue = channel if channel is not None else queue.Queue()
+        self.running = False
+        self.thread = None
+        self.sockets = []
+        self.selector = None
+        self.pool = BufferPool(pool_size, self.buffer_size) if pool_size else None
+        self._scratch = memoryview(bytearray(self.buffer_size))
+        self._wake_reader = None
+        self._wake_writer = None
+        self.timestamps = timestamps
+        self.kernel_timestamps = False
+        self.rcvbuf = rcvbuf
+        # "ip:port" of every endpoint -> granted receive buffer and kernel drops
+        self.effective_rcvbuf = {}
+        self.drop_counter = False
+        self.kernel_drops = {}
+        self.received = 0
+
+    def start(self):
+        if self.running:
+            logging.warning("Receiver already running.")
+            return False
+        if not self.sockets and not self.connect():
+            logging.error("Connection failed.")
+            return False
+        self.running = True
+        self.thread = threading.Thread(target=self.handle_data, daemon=True)
+        self.thread.start()
+        logging.info("Multi receiver started.")
+        return True
+
+    def stop(self):
+        self.running = False
+        if self._wake_writer:
+            try:
+                self._wake_writer.send(b"\0")
+            except socket.error:
+                pass
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join()
+        logging.info("Multi receiver stopped.")
+
+    def close(self):
+        self.stop()
+        if self.selector:
+            self.selector.close()
+            self.selector = None
+        for sock in self.sockets:
+            sock.close()
+        self.sockets = []
+        if self._wake_reader:
+            self._wake_reader.close()
+            self._wake_writer.close()
+            self._wake_reader = None
+            self._wake_writer = None
+        logging.info("Multi receiver closed.")
+
+    def is_running(self):
+        return self.running
+
+    def connect(self):
+        """Bind all endpoints, nothing stays bound if one of them fails."""
+        self.selector = selectors.DefaultSelector()
+        self.kernel_timestamps = self.timestamps
+        self.drop_counter = True
+        self.effective_rcvbuf = {}
+        self.kernel_drops = {}
+        try:
+            for ip, port in self.endpoints:
+                endpoint = f"{ip}:{port}"
+                sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                self.sockets.append(sock)
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                sock.bind((ip, port))
+                sock.setblocking(False)
+                if self.rcvbuf:
+                    granted = set_receive_buffer(sock, self.rcvbuf)
+                    if granted < self.rcvbuf:
+                        logging.warning(
+                            f"Receive buffer of {self.rcvbuf} bytes requested for {endpoint}, "
+                            f"got {granted} (see net.core.rmem_max)."
+                        )
+                else:
+                    granted = receive_buffer(sock)
+                self.effective_rcvbuf[endpoint] = granted
+                self.kernel_drops[endpoint] = 0
+                self.drop_counter &= enable_drop_counter(sock)
+                if self.timestamps:
+                    self.kernel_timestamps &= enable_kernel_timestamps(sock)
+                # the data of a key: the source name of the endpoint and its port
+                self.selector.register(sock, selectors.EVENT_READ, (endpoint, port))
+                logging.info(f"Receiver connected to {endpoint}.")
+            if self.timestamps and not self.kernel_timestamps:
+                logging.info("No kernel receive timestamps, stamping on receive.")
+            self._wake_reader, self._wake_writer = socket.socketpair()
+            self._wake_reader.setblocking(False)
+            self.selector.register(self._wake_reader, selectors.EVENT_READ, None)
+            return True
+        except socket.error as e:
+            logging.error(f"Socket error while connecting: {e}")
+            self.close()
+            return False
+
+    def handle_data(self):
+        while self.running:
+            try:
+                for key, _ in self.selector.select():
+                    if key.data is None:
+                        try:
+                            self._wake_reader.recv(64)
+                        except BlockingIOError:
+                            pass
+                    else:
+                        self.drain(key.fileobj, *key.data)
+            except (socket.error, ValueError) as e:
+                if self.running:
+                    logging.error(f"Socket error while receiving data: {e}")
+                self.running = False
+
+    def drain(self, sock, source, port):
+        """Receive every pending datagram of one socket."""
+        pool = self.pool
+        scratch = self._scratch
+        by_sender = self.source_by == "sender"
+        kernel_timestamps = self.kernel_timestamps
+        drop_counter = self.drop_counter
+        ancillary = (ancillary_size() if kernel_timestamps else 0) + (
+            drop_counter_size() if drop_counter else 0
+        )
+        while self.running:
+            buffer = pool.acquire() if pool else None
+            target = buffer if buffer is not None else scratch
+            try:
+                if ancillary:
+                    size, ancdata, _, address = sock.recvmsg_into([target], ancillary)
+                    if drop_counter:
+                        dropped = drop_count(ancdata)
+                        if dropped is not None:
+                            self.kernel_drops[source] = dropped
+                else:
+                    size, address = sock.recvfrom_into(target)
+            except BlockingIOError:
+                if buffer is not None:
+                    pool.release(buffer)
+                return
+            datagram = Datagram(
+                memoryview(buffer)[:size] if buffer is not None else scratch[:size].tobytes(),
+                f"{address[0]}:{address[1]}" if by_sender else source,
+                address,
+                port,
+                arrival_time(ancdata) if kernel_timestamps else time.perf_counter(),
+            )
+            self.received += 1
+            if self.callback:
+                self.callback(datagram)
+            else:
+                self.data_queue.put(datagram)
+
+    def stats(self):
+        """
+        As UDPReceiverQ.stats, with the drops summed over the sockets and the
+        smallest receive buffer granted; endpoints holds the drops per
+        endpoint.
+        """
+        if self.drop_counter:
+            dropped = dict(self.kernel_drops)
+        else:
+            dropped = {
+                self.selector.get_key(sock).data[0]: proc_net_udp_drops(sock)
+                for sock in self.sockets
+            }
+        known = dropped and None not in dropped.values()
+        return {
+            "received": self.received,
+            "dropped": sum(dropped.values()) if known else None,
+            "rcvbuf": min(self.effective_rcvbuf.values()) if self.effective_rcvbuf else None,
+            "endpoints": dropped,
+            "pool_misses": self.pool.misses if self.pool else 0,
+        }
+
+    def release(self, data):
+        """Give the memoryview of a Datagram back to the pool; bytes are ignored."""
+        if self.pool is not None and isinstance(data, memoryview):
+            self.pool.release(data.obj)
+
+    def get_data_block(self, timeout=0.1):
+        try:
+            return self.data_queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def get_data_block_nowait(self):
+        try:
+            return self.data_queue.get_nowait()
+        except queue.Empty:
+            return None
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
 class Player(DataSource):
-    """Plays back a recording of timestamped data."""
+    """
+    Plays back a recording of timestamped data.
 
-    def __init__(self, callback=None):
+    By default a .bin recording is read into a list up front. With streaming
+    it is mapped as a BinRecording instead, loading takes the same time for
+    any length and the packets are handed out as memoryviews into the file.
+
+    seek, jump_to_frame and set_trim move the playback by the record
+    timestamps without replaying what comes before; the timestamps of a
+    streamed recording are scanned (or read from its sidecar index) the
+    first time one of them is used.
+
+    set_rate plays faster or slower than recorded. Unthrottled, the records
+    go out as fast as the callback or the channel takes them; with a
+    blocking callback such as Synchronizer.push into a "bounded" channel the
+    whole pipeline then runs at the speed of its slowest stage.
+
+    load_playlist plays several recordings back to back, the next one is
+    opened on a background thread while the current one plays, or overlays
+    them into one crowd. Seeking and trimming apply to the recording that
+    is playing.
+    """
+
+    # playback rates set_rate accepts
+    MIN_RATE = 0.25
+    MAX_RATE = 16.0
+
+    def __init__(self, callback=None, streaming=False, channel=None):
         self.data = []
+        self.streaming = streaming
+        self.rate = 1.0
+        self.unthrottled = False
+        # paces the records, see PlaybackClock
+        self.clock = PlaybackClock()
+        # records handed out since the player was started
+        self.played = 0
+        self.playlist = []
+        self.playlist_index = 0
+        self.prefetcher = Prefetcher(self.open_recording)
+        self._timestamps = None
+        # record number the playback jumps to next, see seek; written by the
+        # GUI thread and taken by the play thread under _seek_lock
+        self._seek_position = None
+        self._seek_lock = threading.Lock()
+        self.trim_start = None
+        self.trim_end = None
+        # record number of the last packet handed out
+        self.position = 0
         self.callback = callback
         self.playing = False
         self.thread = None
-        self.queue = queue.Queue()
+        # see src.channels.make_channel
+        self.queue = channel if channel is not None else queue.Queue()
         self.paused = False
 
     def start(self):
         self.playing = True
+        self.played = 0
+        self.clock.clear()
         self.thread = threading.Thread(target=self.play_loop)
         self.thread.start()
         logging.info("Player started.")
@@ -146,8 +615,35 @@ class Player(DataSource):
 
     def close(self):
         self.stop()
+        self.unload()
         logging.info("Player closed.")
 
+    def set_rate(self, rate):
+        """Play at rate times the recorded speed, also while playing."""
+        if not self.MIN_RATE <= rate <= self.MAX_RATE:
+            raise ValueError(
+                f"Playback rate must be between {self.MIN_RATE} and {self.MAX_RATE}, got {rate}."
+            )
+        self.rate = rate
+
+    def set_unthrottled(self, unthrottled):
+        """Ignore the timestamps and hand out the records as fast as they are taken."""
+        self.unthrottled = unthrottled
+
+    def set_streaming(self, streaming):
+        """Map .bin recordings loaded from now on instead of reading them."""
+        self.streaming = streaming
+
+    def unload(self):
+        if isinstance(self.data, BinRecording):
+            self.data.close()
+        self.data = []
+        self.playlist = []
+        self.prefetcher.cancel()
+        self._timestamps = None
+        self._seek_position = None
+        self.position = 0
+
     def load(self, file_path):
         file_type = file_path.split(".")[-1]
         if file_type == "bin":
@@ -158,40 +654,80 @@ class Player(DataSource):
             logging.error(f"Unsupported file type: {file_type}")
 
     def load_from_bin(self, file_path):
-        self.data = []
-        if not os.path.exists(file_path):
-            logging.error(f"File not found: {file_path}")
+        self.unload()
+        if self.streaming:
+            self.data = open_bin(file_path) or []
+        else:
+            self.data = load_from_bin(file_path) or []
+
+    def open_recording(self, file_path):
+        """
+        Read or, streaming, map a .bin recording and scan its record index,
+        an empty list if that fails. Safe to call from another thread.
+        """
+        if not self.streaming:
+            return load_from_bin(file_path) or []
+        recording = open_bin(file_path)
+        if recording is None:
+            return []
+        # parses the headers and pulls the file into the page cache
+        recording.index()
+        return recording
+
+    def load_playlist(self, file_paths, overlay=False):
+        """
+        Play the .bin recordings of file_paths one after another, looping
+        over the list, or with overlay all at once with their trackers
+        renamed apart (see overlay_recordings).
+        """
+        if not file_paths:
+            raise ValueError("The playlist is empty.")
+        self.unload()
+        if overlay:
+            recordings = [self.open_recording(path) for path in file_paths]
+            self.data = overlay_recordings(recordings)
+            for recording in recordings:
+                if isinstance(recording, BinRecording):
+                    recording.close()
+            logging.info(f"Overlaid {len(recordings)} recordings.")
             return
-        with open(file_path, "rb") as f:
-            # Read the header
-            first = f.read(4)
-            if not first:
-                logging.error("File is empty or corrupted.")
-                return
-            start_time = struct.unpack("<f", first)[0]
-            length = struct.unpack("I", f.read(4))[0]
-            if length != 0:
-                logging.warning(
-                    "File might be old and recording time is wrong. Interpreting header as data...."
-                )
-                data = f.read(length)
-            logging.info(f"Recording time: {start_time}")
-
-            while True:
-                first = f.read(4)
-                if not first:
-                    logging.info("End of file reached.")
-                    break
-                if first == b"\x00":
-                    logging.info("End of file reached.")
-                    break
-                timestamp = struct.unpack("<f", first)[0]
-                length = struct.unpack("I", f.read(4))[0]
-                data = f.read(length)
-                self.data.append((timestamp, data))
+        self.playlist = list(file_paths)
+        self.playlist_index = 0
+        self.data = self.open_recording(self.playlist[0])
+        if len(self.playlist) > 1:
+            self.prefetcher.request(self.playlist[1])
+
+    def next_recording(self):
+        """
+        Switch to the next recording of the playlist, prefetched meanwhile.
+        Recordings that cannot be opened are skipped, if none can the
+        playback stops.
+        """
+        for _ in self.playlist:
+            self.playlist_index = (self.playlist_index + 1) % len(self.playlist)
+            path = self.playlist[self.playlist_index]
+            try:
+                data = self.prefetcher.take(path)
+            except OSError as e:
+                logging.error(f"Could not open {path}: {e}")
+                data = None
+            if data:
+                break
+            logging.error(f"Skipping {path} of the playlist.")
+        else:
+            logging.error("No recording of the playlist can be played, stopping.")
+            self.playing = False
+            data = []
+        if isinstance(self.data, BinRecording):
+            self.data.close()
+        self.data = data
+        self._timestamps = None
+        self._seek_position = None
+        self.prefetcher.request(self.playlist[(self.playlist_index + 1) % len(self.playlist)])
+        logging.info(f"Playing {self.playlist[self.playlist_index]}.")
 
     def load_from_text(self, file_path):
-        self.data = []
+        self.unload()
         if not os.path.exists(file_path):
             logging.error(f"File not found: {file_path}")
             return
@@ -205,24 +741,92 @@ class Player(DataSource):
     def is_playing(self):
         return self.playing
 
+    def timestamps(self):
+        """The timestamps of all records as a numpy array."""
+        if self._timestamps is None:
+            if isinstance(self.data, BinRecording):
+                self._timestamps = self.data.index()[0]
+            else:
+                self._timestamps = np.array([timestamp for timestamp, _ in self.data])
+        return self._timestamps
+
+    def frame_count(self):
+        return len(self.timestamps())
+
+    def find(self, timestamp):
+        """Number of the first record at or after timestamp."""
+        return int(np.searchsorted(self.timestamps(), timestamp, side="left"))
+
+    def seek(self, timestamp):
+        """Continue the playback at timestamp seconds into the recording."""
+        if self.trim_start is not None:
+            timestamp = max(timestamp, self.trim_start)
+        position = self.find(timestamp)
+        with self._seek_lock:
+            self._seek_position = position
+
+    def jump_to_frame(self, frame):
+        """Continue the playback at record number frame."""
+        position = min(max(frame, 0), self.frame_count())
+        with self._seek_lock:
+            self._seek_position = position
+
+    def _take_seek(self):
+        """The record number seeked to, None if there is none, and clear it."""
+        with self._seek_lock:
+            position, self._seek_position = self._seek_position, None
+        return position
+
+    def set_trim(self, start=None, end=None):
+        """Play only the records from start up to end seconds, None for no limit."""
+        self.trim_start = start
+        self.trim_end = end
+
+    def _records(self, position):
+        if isinstance(self.data, BinRecording):
+            return self.data.records(position)
+        return itertools.islice(self.data, position, None)
+
     def play(self):
-        start_time = time.time()
-        for timestamp, data in self.data:
-            if not self.playing:
-                return
+        """Play the recording between the trim points once."""
+        if self._seek_position is None and self.trim_start is not None:
+            self.seek(self.trim_start)
+        records = None
+        while self.playing:
+            if records is None or self._seek_position is not None:
+                position = self._take_seek() or 0
+                records = self._records(position)
+                synced = False
+            try:
+                timestamp, data = next(records)
+            except StopIteration:
+                break
+            if self.trim_end is not None and timestamp >= self.trim_end:
+                break
+            if self.unthrottled:
+                synced = False
+            elif not synced or rate != self.rate:
+                # the first record after a seek or a rate change goes out right away
+                rate = self.rate
+                self.clock.start(timestamp / rate)
+                synced = True
             if self.paused:
-                pause_time = time.time()
+                pause_time = time.perf_counter()
                 while self.paused:
                     time.sleep(0.1)
-                time_diff = time.time() - pause_time
-                start_time += time_diff
-            time_diff = time.time() - start_time
-            if time_diff < timestamp:
-                time.sleep(timestamp - time_diff)
+                if synced:
+                    self.clock.shift(time.perf_counter() - pause_time)
+            if synced:
+                self.clock.wait(timestamp / rate)
+            self.position = position
+            position += 1
+            self.played += 1
             if self.callback:
                 self.callback(data)
             else:
                 self.queue.put(data)
+        else:
+            return
         logging.info("Player looped.")
         
     def pause(self):
@@ -238,7 +842,9 @@ class Player(DataSource):
     def play_loop(self):
         while self.is_playing():
             self.play()
-        logging.info("Loop stopped.")
+            if self.is_playing() and len(self.playlist) > 1:
+                self.next_recording()
+        logging.info(f"Loop stopped. Playback deadlines: {self.clock.stats()}")
 
     def set_callback(self, callback):
         self.callback = callback
@@ -257,19 +863,126 @@ class Player(DataSource):
 
 
 class Synchronizer(DataSource):
-    def __init__(self, callbacks=[]):
+    """
+    Merges the trackers of several sources into one frame.
+
+    Sources either push their packets (add_source returns the callback to
+    hand to a Player or UDPReceiverQ) or are polled by add_callback, in which
+    case each one gets a pump thread that pushes what it returns. All packets
+    land in one inbox, so a frame is merged as soon as any source delivers
+    instead of after a poll round over all of them.
+
+    After the first packet of a frame the other sources get merge_window
+    seconds to deliver theirs. With coalesce a newer packet of a source
+    replaces its pending one, counted in coalesced; without, it closes the
+    frame and starts the next, so every packet is merged into a frame. By
+    default only a latest-value inbox coalesces, a fifo or bounded one
+    delivers every packet and so does the merge. Sources that sent nothing
+    for idle_timeout seconds are not waited for. Later sources win for
+    trackers with the same name.
+
+    The trackers are kept in a TrackerStore, every frame holds all trackers
+    updated within tracker_ttl seconds, not only those of the packets that
+    triggered it. With a tracker_ttl of None a frame holds only the trackers
+    of those packets.
+
+    With an output_rate the frames are not emitted per packet but by a clock
+    at that rate (Hz). Each tick the positions are resampled to the tick time
+    minus interpolation_delay, see TrackerStore.sample. The clock needs a
+    tracker_ttl, without one trackers that are gone would stay forever.
+
+    With stamping the frames are StampedBytes or StampedFrames whose marks
+    start at the arrival of the oldest packet merged into them, see
+    src.latency.LatencyStats.
+
+    With a ReplayCache the frames of frame mode carry their raw records as
+    key, and frames whose key is cached are not decoded but handed out
+    with their records for the Processor to look up; packets are their own
+    key. Frames are only keyed while all sources are among the replay
+    sources, live packets never come round again and would only fill the
+    cache.
+    """
+
+    def __init__(
+        self,
+        callbacks=None,
+        merge_window=0.005,
+        idle_timeout=0.5,
+        tracker_ttl=0.2,
+        output_rate=None,
+        interpolation_delay=0.0,
+        max_extrapolation=0.05,
+        channel=None,
+        inbox=None,
+        coalesce=None,
+    ):
         self.running = False
         self.thread = None
-        self.callbacks = callbacks
-        self.queue = queue.Queue()
+        self.callbacks = callbacks if callbacks is not None else []
+        # the frames going out and the (source, packet) pairs coming in, see
+        # src.channels.make_channel
+        self.queue = channel if channel is not None else queue.Queue()
+        self.inbox = inbox if inbox is not None else queue.Queue()
+        if hasattr(self.inbox, "on_drop"):
+            # packets the inbox drops are given back as well
+            self.inbox.on_drop = self.discard
+        # by default only a latest-value inbox is allowed to lose packets
+        self.coalesce = not isinstance(self.inbox, queue.Queue) if coalesce is None else coalesce
+        # packets replaced by a newer one of their source before they were merged
+        self.coalesced = 0
+        self.merge_window = merge_window
+        self.idle_timeout = idle_timeout
+        # source names in merge order, push sources and polled callbacks alike
+        self.sources = [cb["name"] for cb in self.callbacks]
+        self.last_seen = {}
+        self.pumps = {}
+        # source name -> the function its pooled packets are given back with
+        self.releases = {}
+        # last record of every tracker, a frame holds all that are younger than tracker_ttl
+        self.store = TrackerStore(tracker_ttl)
+        self.output_rate = None
+        self.set_output_rate(output_rate)
+        self.interpolation_delay = interpolation_delay
+        self.max_extrapolation = max_extrapolation
         self.decoder = ViveDecoder()
         self.encoder = ViveEncoder()
+        # hand out lists of tracker dicts instead of packets (in-process consumers)
+        self.frame_mode = False
+        self.stamping = False
+        self.replay_cache = None
+        self.replay_sources = ()
+        # arrival time of the oldest packet not yet in a frame
+        self._arrival = None
+
+    def set_frame_mode(self, frame_mode):
+        self.frame_mode = frame_mode
+
+    def set_replay_cache(self, replay_cache, sources=()):
+        """
+        Share a ReplayCache with the Processor, None to decode every frame.
+        sources are the names of the sources that repeat their packets, e.g.
+        looping Players.
+        """
+        self.replay_cache = replay_cache
+        self.replay_sources = tuple(sources)
+
+    def set_stamping(self, stamping):
+        """Mark the frames with the times they passed the stages, for latency stats."""
+        self.stamping = stamping
+
+    def set_output_rate(self, output_rate):
+        """Emit frames at a fixed rate in Hz, or per merged packet with None."""
+        if output_rate and self.store.ttl is None:
+            raise ValueError("A fixed output rate needs a tracker_ttl.")
+        self.output_rate = output_rate
 
     def start(self):
         if self.running:
             logging.warning("Synchronizer already running.")
             return False
         self.running = True
+        for cb in self.callbacks:
+            self.start_pump(cb)
         self.thread = threading.Thread(target=self.run, daemon=True)
         self.thread.start()
         logging.info("Synchronizer started.")
@@ -279,6 +992,9 @@ class Synchronizer(DataSource):
         self.running = False
         if self.thread:
             self.thread.join()
+        for pump in list(self.pumps.values()):
+            pump.join()
+        self.pumps.clear()
         logging.info("Synchronizer stopped.")
 
     def close(self):
@@ -286,9 +1002,89 @@ class Synchronizer(DataSource):
         logging.info("Synchronizer closed.")
 
     def run(self):
+        next_tick = None
         while self.running:
-            self.sync()
-            
+            if not self.output_rate:
+                next_tick = None
+                self.merge()
+                continue
+
+            # clocked output: collect packets until the tick is due
+            period = 1.0 / self.output_rate
+            now = time.perf_counter()
+            if next_tick is None:
+                next_tick = now
+            if now < next_tick:
+                self.receive(min(next_tick - now, 0.1))
+                continue
+            self.tick(next_tick)
+            next_tick += period
+            if next_tick < now:
+                # fell behind, skip the missed ticks instead of bursting
+                next_tick = now + period
+
+    def add_source(self, name, release=None):
+        """
+        Register a push source and return the callback it delivers its
+        packets to. release is called with every packet once its records
+        are stored or it was dropped, e.g. UDPReceiverQ.release for pooled
+        buffers.
+        """
+        if name in self.sources:
+            logging.warning(f"Source with name {name} already exists.")
+        else:
+            self.sources.append(name)
+        if release is not None:
+            self.releases[name] = release
+        return functools.partial(self.push, name)
+
+    def remove_source(self, name):
+        """Unregister a source, packets it still pushes are dropped."""
+        if name in self.sources:
+            self.sources.remove(name)
+            self.last_seen.pop(name, None)
+            self.store.remove_source(name)
+            self.releases.pop(name, None)
+        else:
+            logging.warning(f"Source with name {name} not found.")
+
+    def push(self, name, data, timestamp=None):
+        """
+        Deliver a packet of the given source, safe to call from any thread.
+        timestamp is its time.perf_counter receive time, now by default.
+        """
+        if timestamp is None:
+            timestamp = time.perf_counter()
+        self.inbox.put((name, data, timestamp))
+
+    def push_datagram(self, datagram, release=None):
+        """
+        Deliver a Datagram of a MultiUDPReceiverQ, its source is registered
+        on first sight with release (see add_source).
+        """
+        if datagram.source not in self.sources:
+            self.add_source(datagram.source, release)
+        self.inbox.put((datagram.source, datagram.data, datagram.timestamp))
+
+    def discard(self, item):
+        """Give back the packet of a (source, packet, arrival time) triple that is not stored."""
+        release = self.releases.get(item[0])
+        if release is not None:
+            release(item[1])
+
+    def start_pump(self, callback):
+        """Poll a callback source on its own thread and push what it returns."""
+
+        def pump():
+            while self.running and callback in self.callbacks:
+                data = callback["callback"](callback["timeout"])
+                if data is not None:
+                    self.push(callback["name"], data)
+
+        thread = threading.Thread(target=pump, daemon=True)
+        self.pumps[callback["name"]] = thread
+        thread.start()
+
     def add_callback(self, callback: dict):
         """Add a callback function to the synchronizer."""
         for cb in self.callbacks:
@@ -297,54 +1093,181 @@ class Synchronizer(DataSource):
                     f"Callback with name {callback['name']} already exists. Overwriting."
                 )
                 self.callbacks.remove(cb)
+                break
         self.callbacks.append(callback)
-        
+        if callback["name"] not in self.sources:
+            self.sources.append(callback["name"])
+        if self.running:
+            self.start_pump(callback)
+
     def remove_callback(self, name):
         """Remove a callback function from the synchronizer."""
         for cb in self.callbacks:
             if cb["name"] == name:
                 logging.info(f"Removing callback: {cb}")
                 self.callbacks.remove(cb)
+                self.remove_source(name)
                 break
         else:
-            logging.warning(f"Callback with name {callback['name']} not found.")
-    
+            logging.warning(f"Callback with name {name} not found.")
+
     def clear_callbacks(self):
         """Clear all callback functions from the synchronizer."""
         logging.info(f"Callbacks: {self.callbacks}")
-        for cb in self.callbacks:
+        for cb in list(self.callbacks):
             self.remove_callback(cb["name"])
-            
+
+    def merge(self, timeout=0.1):
+        """Wait for packets from any source and merge them into one frame."""
+        try:
+            name, data, timestamp = self.inbox.get(timeout=timeout)
+        except queue.Empty:
+            return
+        now = time.perf_counter()
+        pending = {}
+        deadline = now + self.merge_window
+
+        while True:
+            if name in self.sources:
+                if name in pending and self.coalesce:
+                    # a newer packet of the same source replaces the older one
+                    self.discard((name, *pending[name]))
+                    self.coalesced += 1
+                elif name in pending:
+                    # every packet goes out, this one starts the next frame
+                    self.combine(
+                        [(source, *pending[source]) for source in self.sources if source in pending]
+                    )
+                    pending = {}
+                    deadline = now + self.merge_window
+                pending[name] = (data, timestamp)
+                self.last_seen[name] = now
+            else:
+                self.discard((name, data, timestamp))
+
+            # wait only for the sources that are delivering at the moment
+            waiting = [
+                source
+                for source in self.sources
+                if source not in pending
+                and now - self.last_seen.get(source, -math.inf) < self.idle_timeout
+            ]
+            remaining = deadline - now
+            try:
+                if waiting and remaining > 0:
+                    name, data, timestamp = self.inbox.get(timeout=remaining)
+                else:
+                    name, data, timestamp = self.inbox.get_nowait()
+            except queue.Empty:
+                break
+            now = time.perf_counter()
+
+        self.combine(
+            [(source, *pending[source]) for source in self.sources if source in pending]
+        )
+
     def sync(self):
-        # Get data from all sources
-        data = [cb["callback"](cb["timeout"]) for cb in self.callbacks]
-        
-        tracker_names = []
-        all_trackers = []
-        
-        for d in data:
-            # if d is None:
-            #     return
-            if d is not None:
-                self.decoder.decode(d)
-                tracker_data = self.decoder.vive_trackers
-                # combine all trackers
-                # overwrite trackers with the same name
-                for tracker in tracker_data:
-                    name = tracker["name"]
-                    if name in tracker_names:
-                        # overwrite the tracker
-                        index = tracker_names.index(name)
-                        all_trackers[index] = tracker
-                    else:
-                        tracker_names.append(name)
-                        all_trackers.append(tracker)
-        # Encode the data
-        if all_trackers is not None and len(all_trackers) > 0:
-            self.encoder.vive_trackers = all_trackers
-            encoded_data = self.encoder.encode()
-            self.queue.put(encoded_data)
-        
+        """Poll all callbacks one after another and merge what they return."""
+        now = time.perf_counter()
+        self.combine(
+            [(cb["name"], cb["callback"](cb["timeout"]), now) for cb in self.callbacks]
+        )
+
+    def receive(self, timeout):
+        """Move the packets in the inbox to the tracker store without emitting a frame."""
+        try:
+            name, data, timestamp = self.inbox.get(timeout=timeout)
+        except queue.Empty:
+            return
+        packets = []
+        while True:
+            if name in self.sources:
+                self.last_seen[name] = time.perf_counter()
+                packets.append((name, data, timestamp))
+            else:
+                self.discard((name, data, timestamp))
+            try:
+                name, data, timestamp = self.inbox.get_nowait()
+            except queue.Empty:
+                break
+        self.update_store(packets)
+
+    def tick(self, timestamp):
+        """Queue a frame of all fresh trackers resampled to the tick time."""
+        self.store.evict(time.perf_counter())
+        all_trackers = self.store.sample(
+            timestamp - self.interpolation_delay, self.max_extrapolation
+        )
+        if all_trackers:
+            self.emit(all_trackers)
+
+    def combine(self, packets):
+        """
+        Update the tracker store with (source, packet, arrival time) triples
+        and queue a frame of all trackers that are still fresh.
+        """
+        if self.store.ttl is None:
+            self.store.clear()
+        else:
+            self.store.evict(time.perf_counter())
+
+        if self.update_store(packets):
+            self.emit(self.store.items())
+
+    def update_store(self, packets):
+        """Store the records of (source, packet, arrival time) triples, True if there were any."""
+        # later sources overwrite trackers with the same name in place; the
+        # raw records are spliced without decoding them
+        updated = False
+        for source, data, timestamp in packets:
+            if data is not None:
+                records = self.decoder.scan_records(data)
+                if records:
+                    updated = True
+                    for name, record in records:
+                        self.store.update(name, record, source, timestamp)
+                    if self._arrival is None or timestamp < self._arrival:
+                        self._arrival = timestamp
+                # the store copied the records
+                self.discard((source, data, timestamp))
+        return updated
+
+    def emit(self, all_trackers):
+        """Queue a frame of (name, record) pairs as a packet or as tracker dicts."""
+        key = None
+        replayed = self.replay_cache is not None and all(
+            source in self.replay_sources for source in self.sources
+        )
+        if self.frame_mode and replayed:
+            key = b"".join([record for _, record in all_trackers])
+            # a cached frame needs no decoding, the Processor looks it up by the key
+            if key in self.replay_cache:
+                # the store reuses its record buffers, keep copies
+                frame = KeyedFrame(
+                    [], key, [(name, bytes(record)) for name, record in all_trackers]
+                )
+            else:
+                frame = KeyedFrame(self.decoder.decode_records(all_trackers), key)
+        elif self.frame_mode:
+            # only the winning records are decoded
+            frame = self.decoder.decode_records(all_trackers)
+        else:
+            # Encode the data
+            frame = self.encoder.encode_records(record for _, record in all_trackers)
+            if replayed:
+                # a packet is its own key
+                key = frame
+                frame = KeyedBytes(frame, key)
+        if self.stamping and self._arrival is not None:
+            records = getattr(frame, "records", None)
+            marks = [("arrival", self._arrival), ("merge", time.perf_counter())]
+            frame = StampedFrame(frame, marks) if self.frame_mode else StampedBytes(frame, marks)
+            if key is not None:
+                frame.key = key
+                frame.records = records
+        self._arrival = None
+        self.queue.put(frame)
+
     def get_data_block(self, timeout=0.1):
         try:
             return self.queue.get(timeout=timeout)
@@ -0,0 +1,139 @@
+import struct
+
+# position of a tracker record, see ViveDecoder for the layout
+_POSITION = struct.Struct("<3f")
+_POSITION_OFFSET = 12
+
+
+class TrackerStore:
+    """
+    Latest raw record of every tracker, keyed by its raw 8-byte name.
+
+    Each entry remembers the source it came from and when it was updated
+    (time.perf_counter seconds). Entries that were not updated for ttl
+    seconds are evicted, so a tracker survives a late packet of its source
+    but disappears once the source stops sending it. The sample before the
+    latest is kept as well so that positions can be resampled in time.
+
+    An update older than the stored record of a tracker is ignored if both
+    came from the same source, a reordered packet must not roll it back.
+    A record of another source replaces it whatever its time, so that the
+    source merged last wins (see Synchronizer). With a ttl of None nothing
+    expires, the entries stay until they are removed or cleared.
+
+    The records are copied into buffers of the store, two per tracker that
+    take turns as latest and previous sample, so the packets they came from
+    can be reused (see BufferPool) and no record is allocated per packet.
+    The records handed out by items and sample are only valid until the
+    next update.
+    """
+
+    def __init__(self, ttl=0.2):
+        self.ttl = ttl
+        self.records = {}
+        self.sources = {}
+        self.last_update = {}
+        # name -> (record, timestamp) of the sample before the latest
+        self.previous = {}
+
+    def __len__(self):
+        return len(self.records)
+
+    def __contains__(self, name):
+        return name in self.records
+
+    def update(self, name, record, source, timestamp):
+        """Store the record of a tracker, False if its source sent a newer one before."""
+        current = self.records.get(name)
+        buffer = None
+        if current is not None:
+            last_update = self.last_update[name]
+            if timestamp < last_update:
+                if self.sources[name] == source:
+                    return False
+                # an older sample of another source, nothing to interpolate from
+                self.previous.pop(name, None)
+                buffer = current
+            elif timestamp > last_update:
+                # the buffer of the previous sample takes the new record
+                previous = self.previous.get(name)
+                self.previous[name] = (current, last_update)
+                if previous is not None:
+                    buffer = previous[0]
+            else:
+                buffer = current
+        if buffer is None or len(buffer) != len(record):
+            buffer = bytearray(len(record))
+        buffer[:] = record
+        self.records[name] = buffer
+        self.sources[name] = source
+        self.last_update[name] = timestamp
+        return True
+
+    def evict(self, now):
+        """Drop the entries older than ttl, return their names."""
+        if self.ttl is None:
+            return []
+        oldest = now - self.ttl
+        stale = [name for name, timestamp in self.last_update.items() if timestamp < oldest]
+        for name in stale:
+            del self.records[name]
+            del self.sources[name]
+            del self.last_update[name]
+            self.previous.pop(name, None)
+        return stale
+
+    def remove_source(self, source):
+        """Drop the entries of a source, e.g. when it was unregistered."""
+        names = [name for name, owner in self.sources.items() if owner == source]
+        for name in names:
+            del self.records[name]
+            del self.sources[name]
+            del self.last_update[name]
+            self.previous.pop(name, None)
+        return names
+
+    def items(self):
+        """(name, record) pairs in the order the trackers first appeared."""
+        return list(self.records.items())
+
+    def sample(self, timestamp, max_extrapolation=0.05, min_interval=0.002):
+        """
+        (name, record) pairs with the positions moved to the given time.
+
+        Between the last two samples of a tracker the position is
+        interpolated linearly, past the latest one it is extrapolated with
+        their velocity for at most max_extrapolation seconds. Samples closer
+        than min_interval give no usable velocity and are returned as they
+        are, as is the rest of the record.
+        """
+        items = []
+        for name, record in self.records.items():
+            previous = self.previous.get(name)
+            if previous is not None:
+                previous_record, previous_time = previous
+                last_time = self.last_update[name]
+                interval = last_time - previous_time
+                if interval >= min_interval:
+                    t = min(timestamp, last_time + max_extrapolation) - previous_time
+                    # before the previous sample there is nothing to interpolate, hold it
+                    weight = max(t / interval, 0.0)
+                    if weight != 1.0:
+                        x0, y0, z0 = _POSITION.unpack_from(previous_record, _POSITION_OFFSET)
+                        x1, y1, z1 = _POSITION.unpack_from(record, _POSITION_OFFSET)
+                        record = bytearray(record)
+                        _POSITION.pack_into(
+                            record,
+                            _POSITION_OFFSET,
+                            x0 + (x1 - x0) * weight,
+                            y0 + (y1 - y0) * weight,
+                            z0 + (z1 - z0) * weight,
+                        )
+            items.append((name, record))
+        return items
+
+    def clear(self):
+        self.records.clear()
+        self.sources.clear()
+        self.last_update.clear()
+        self.previous.clear()
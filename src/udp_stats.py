@@ -0,0 +1,70 @@
+import os
+import sys
+import socket
+import struct
+
+# the kernel counts the datagrams it dropped on a full receive buffer and
+# attaches the count to every datagram, Linux only
+SO_RXQ_OVFL = getattr(socket, "SO_RXQ_OVFL", 40 if sys.platform.startswith("linux") else None)
+_COUNTER = struct.Struct("@I")
+
+
+def set_receive_buffer(sock, size):
+    """Request a receive buffer of size bytes, return the size the kernel granted."""
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, size)
+    except OSError:
+        pass
+    return receive_buffer(sock)
+
+
+def receive_buffer(sock):
+    """
+    The effective receive buffer of sock in bytes. Linux reports twice the
+    requested size (the other half is bookkeeping) and caps the request at
+    net.core.rmem_max.
+    """
+    return sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF)
+
+
+def enable_drop_counter(sock):
+    """Ask the kernel to attach its drop count to every datagram, True if it will."""
+    if SO_RXQ_OVFL is None:
+        return False
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, SO_RXQ_OVFL, 1)
+        return True
+    except (OSError, AttributeError):
+        return False
+
+
+def drop_counter_size():
+    """Size of the control buffer recvmsg_into needs for the drop count."""
+    return socket.CMSG_SPACE(_COUNTER.size)
+
+
+def drop_count(ancdata):
+    """The drop count in the control messages of recvmsg_into, None if there is none."""
+    for level, kind, payload in ancdata:
+        if level == socket.SOL_SOCKET and kind == SO_RXQ_OVFL and len(payload) >= _COUNTER.size:
+            return _COUNTER.unpack_from(payload)[0]
+    return None
+
+
+def proc_net_udp_drops(sock, path="/proc/net/udp"):
+    """
+    The drop count of sock from /proc/net/udp, found by its inode, or None
+    where there is no such table.
+    """
+    try:
+        inode = str(os.fstat(sock.fileno()).st_ino)
+        with open(path, "r", encoding="ascii") as f:
+            next(f)
+            for line in f:
+                fields = line.split()
+                # ... uid timeout inode ref pointer drops
+                if len(fields) >= 13 and fields[9] == inode:
+                    return int(fields[-1])
+    except (OSError, ValueError, StopIteration):
+        pass
+    return None
@@ -1,6 +1,10 @@
 import math
 import copy
 
+import numpy as np
+
+from src.vive_decoder import ViveTrackerArrays
+
 
 class ViveAugmentor:
     def __init__(self):
@@ -80,6 +84,44 @@ class ViveAugmentor:
 
         return decoded_augm_data
 
+    def augment_arrays(self, frame, slider_value):
+        """Vectorized counterpart of augment for a ViveTrackerArrays frame."""
+        num_devices = len(frame)
+
+        if num_devices == 0:
+            return None
+
+        if num_devices == slider_value:
+            # No augmentation needed
+            return frame
+        elif num_devices > slider_value:
+            # Reduce the number of devices
+            return frame.select(slice(0, slider_value))
+
+        num_fake = slider_value - num_devices
+        if num_fake > len(self.fake_tracker_names):
+            raise IndexError("Not enough fake tracker names for the augmentation.")
+
+        # cycle through the existing devices and give each copy a unique name
+        fake = frame.records[np.arange(num_fake) % num_devices]
+        fake["name"] = self.fake_tracker_names[:num_fake]
+
+        # rotate x, y (unity x, z) by a unique angle per augmentation index
+        angle = (2 * math.pi / num_fake) * (np.arange(num_fake) + 1)
+        x = fake["position"][:, 0].astype(np.float64)
+        y = fake["position"][:, 2].astype(np.float64)
+        new_x = x * np.cos(angle) - y * np.sin(angle)
+        new_y = x * np.sin(angle) + y * np.cos(angle)
+
+        # Ensure the values stay within the range of -4 to 4
+        new_x = np.where((new_x > 4) | (new_x < -4), np.mod(new_x, 8) - 4, new_x)
+        new_y = np.where((new_y > 4) | (new_y < -4), np.mod(new_y, 8) - 4, new_y)
+
+        fake["position"][:, 0] = new_x
+        fake["position"][:, 2] = new_y
+
+        return ViveTrackerArrays(np.concatenate([frame.records, fake]), frame.blobs)
+
 
 if __name__ == "__main__":
 
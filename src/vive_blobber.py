@@ -19,7 +19,7 @@ class ViveBlobber:
                 - The weight of the blob (number of positions within the blob).
         """
 
-        if not positions:
+        if len(positions) == 0:
             return [], []
 
         positions = np.array(
@@ -93,6 +93,29 @@ class ViveBlobber:
 
         return blobs, vr_tracker_data
 
+    def process_arrays(self, positions, is_tracked):
+        """
+        Array counterpart of process_data.
+
+        Args:
+            positions: An (N, 3) array of tracker positions.
+            is_tracked: An (N,) boolean array.
+
+        Returns:
+            A list of blobs and an (N,) array of blob IDs (255 for untracked trackers).
+        """
+
+        blob_ids = np.full(len(positions), 255, dtype=np.intp)
+        tracked = np.flatnonzero(is_tracked)
+
+        # Use only x, z for blob detection
+        blobs, blob_indices = self.get_blobs(
+            positions[tracked][:, [0, 2]].astype(np.float64)
+        )
+        blob_ids[tracked] = blob_indices
+
+        return blobs, blob_ids
+
 
 if __name__ == "__main__":
 
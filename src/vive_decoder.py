@@ -1,21 +1,333 @@
+import sys
 import time
 import struct
 
+import numpy as np
+
+# Wire layout of one tracker record (40 bytes):
+#   name (8s), device_class (B), battery (B), flags (B), tracking_result (B),
+#   position (3f), rotation (4f)
+# device class 2 (controllers) appends button state (Q) and 5 axes (10f) -> 88 bytes
+_TRACKER_RECORD = struct.Struct("<8sBBBB3f4f")
+_CONTROLLER_RECORD = struct.Struct("<Q10f")
+_BLOB_RECORD = struct.Struct("<3f")
+# name and device class, the head of every record
+_RECORD_HEAD = struct.Struct("<8sB")
+
+# bound for the per-packet-layout caches of the array decode modes
+_MAX_LAYOUTS = 256
+
+# the same 40-byte record as a numpy structured dtype, used by decode_arrays
+TRACKER_DTYPE = np.dtype(
+    [
+        ("name", "S8"),
+        ("device_class", "u1"),
+        ("battery", "u1"),
+        ("flags", "u1"),
+        ("tracking_result", "u1"),
+        ("position", "<f4", (3,)),
+        ("rotation", "<f4", (4,)),
+    ]
+)
+BLOB_DTYPE = np.dtype("<f4")
+
+
+class ViveTrackerArrays:
+    """
+    Column views over the tracker records of one packet, as returned by
+    ViveDecoder.decode_arrays.
+
+    positions is an (N, 3) and rotations an (N, 4) float32 array, the other
+    columns are 1-D arrays of length N. blobs is an (B, 3) float32 array of
+    (x, y, weight) or None if the packet has no blob section.
+    """
+
+    def __init__(self, records, blobs=None):
+        self.records = records
+        self.blobs = blobs
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def names(self):
+        return self.records["name"]
+
+    @property
+    def device_class(self):
+        return self.records["device_class"]
+
+    @property
+    def battery(self):
+        return self.records["battery"] / 100.0
+
+    @property
+    def blob_ids(self):
+        # the battery byte carries the blob id when the packet has blobs
+        return self.records["battery"]
+
+    @property
+    def flags(self):
+        return self.records["flags"]
+
+    @property
+    def status(self):
+        return (self.records["flags"] & (1 << 0)) != 0
+
+    @property
+    def is_tracked(self):
+        return (self.records["flags"] & (1 << 1)) != 0
+
+    @property
+    def tracking_result(self):
+        return self.records["tracking_result"]
+
+    @property
+    def positions(self):
+        return self.records["position"]
+
+    @property
+    def rotations(self):
+        return self.records["rotation"]
+
+    @classmethod
+    def from_dicts(cls, vive_trackers):
+        """Build a frame from a list of tracker dicts as returned by ViveDecoder.decode."""
+        records = np.zeros(len(vive_trackers), dtype=TRACKER_DTYPE)
+        if len(vive_trackers) > 0:
+            records["name"] = [tracker["name"].encode("utf-8") for tracker in vive_trackers]
+            records["device_class"] = [tracker["device_class"] for tracker in vive_trackers]
+            records["battery"] = [round(tracker["battery"] * 100) for tracker in vive_trackers]
+            records["flags"] = [
+                (1 if tracker["status"] else 0) | (2 if tracker["is_tracked"] else 0)
+                for tracker in vive_trackers
+            ]
+            records["tracking_result"] = [tracker["tracking_result"] for tracker in vive_trackers]
+            records["position"] = [tracker["position"] for tracker in vive_trackers]
+            records["rotation"] = [tracker["rotation"] for tracker in vive_trackers]
+        return cls(records)
+
+    def select(self, indices):
+        """Return the trackers at the given indices (or boolean mask) as a new frame."""
+        return ViveTrackerArrays(self.records[indices], self.blobs)
+
+    def to_dicts(self):
+        """Convert to the list of tracker dicts returned by ViveDecoder.decode."""
+        vive_trackers = []
+        for record in self.records.tolist():
+            name, device_class, battery, flags, tracking_result, position, rotation = record
+            vr_tracker_device = {
+                "name": name.decode("utf-8"),
+                "device_class": device_class,
+                "battery": battery / 100.0,
+                "status": (flags & (1 << 0)) != 0,
+                "is_tracked": (flags & (1 << 1)) != 0,
+                "tracking_result": tracking_result,
+                "position": position.tolist(),
+                "rotation": rotation.tolist(),
+            }
+            if self.blobs is not None:
+                vr_tracker_device["blob_id"] = battery
+            vive_trackers.append(vr_tracker_device)
+        return vive_trackers
+
+
+# a TRACKER_DTYPE record as one opaque item
+_RAW_RECORD = np.dtype((np.void, TRACKER_DTYPE.itemsize))
+
+
+class ViveTrackerTable:
+    """
+    Persistent per-tracker state that ViveDecoder.decode_into writes in place.
+
+    Each tracker name gets a slot the first time it is seen, in the order of
+    the packet, so the trackers of a packet layout that keeps repeating fill
+    a run of slots and are written as one slice. The records are kept in one
+    TRACKER_DTYPE array that doubles when the slots run out, so views taken
+    before a new tracker appears may be stale. dirty marks the slots updated
+    by the latest packet and last_update holds the time of the packet that
+    last wrote each slot.
+    """
+
+    def __init__(self, capacity=32):
+        self.names = []
+        self.size = 0
+        self.records = np.zeros(capacity, dtype=TRACKER_DTYPE)
+        # the records as opaque 40-byte items, copied far faster than fields
+        self._raw = self.records.view(_RAW_RECORD)
+        self.dirty_mask = np.zeros(capacity, dtype=bool)
+        self.last_update = np.zeros(capacity, dtype=np.float64)
+        # names as little-endian uint64 keys, sorted for searchsorted lookups
+        self._keys = np.zeros(0, dtype=np.uint64)
+        self._key_slots = np.empty(0, dtype=np.intp)
+        # name keys of a packet -> their slots, a slice where they are a run
+        self._layout_slots = {}
+        # slots written by the latest packet, in its order
+        self.latest = slice(0, 0)
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def dirty(self):
+        return self.dirty_mask[: self.size]
+
+    @property
+    def positions(self):
+        return self.records["position"][: self.size]
+
+    @property
+    def rotations(self):
+        return self.records["rotation"][: self.size]
+
+    @property
+    def status(self):
+        return (self.records["flags"][: self.size] & (1 << 0)) != 0
+
+    @property
+    def is_tracked(self):
+        return (self.records["flags"][: self.size] & (1 << 1)) != 0
+
+    @property
+    def tracking_result(self):
+        return self.records["tracking_result"][: self.size]
+
+    def slots(self, keys):
+        """Return the slots of the given uint64 name keys, adding unseen names."""
+        layout = keys.tobytes()
+        slots = self._layout_slots.get(layout)
+        if slots is None:
+            slots = self._lookup(keys)
+            if len(self._layout_slots) >= _MAX_LAYOUTS:
+                self._layout_slots.clear()
+            self._layout_slots[layout] = slots
+        return slots
+
+    def _lookup(self, keys):
+        new_keys = keys
+        if len(self._keys):
+            index = np.searchsorted(self._keys, keys)
+            found = self._keys.take(index, mode="clip") == keys
+            if found.all():
+                return self._key_slots[index]
+            new_keys = keys[~found]
+        for key in dict.fromkeys(new_keys.tolist()):
+            self._add(key)
+        slots = self._key_slots[np.searchsorted(self._keys, keys)]
+        if len(slots) and (slots == np.arange(slots[0], slots[0] + len(slots))).all():
+            return slice(int(slots[0]), int(slots[0]) + len(slots))
+        return slots
+
+    def frame(self):
+        """
+        Return the trackers of the latest packet, in its order, as a
+        ViveTrackerArrays. Where they fill a run of slots its columns are
+        views into the table, valid until the next decode_into.
+        """
+        return ViveTrackerArrays(self._raw[self.latest].view(TRACKER_DTYPE))
+
+    def _add(self, key):
+        if self.size == len(self.records):
+            self._grow(2 * len(self.records))
+        slot = self.size
+        self.size += 1
+        self.names.append(np.uint64(key).tobytes().rstrip(b"\x00").decode("utf-8"))
+        index = np.searchsorted(self._keys, key)
+        self._keys = np.insert(self._keys, index, key)
+        self._key_slots = np.insert(self._key_slots, index, slot)
+
+    def _grow(self, capacity):
+        records = np.zeros(capacity, dtype=TRACKER_DTYPE)
+        records[: self.size] = self.records[: self.size]
+        dirty_mask = np.zeros(capacity, dtype=bool)
+        dirty_mask[: self.size] = self.dirty_mask[: self.size]
+        last_update = np.zeros(capacity, dtype=np.float64)
+        last_update[: self.size] = self.last_update[: self.size]
+        self.records = records
+        self._raw = records.view(_RAW_RECORD)
+        self.dirty_mask = dirty_mask
+        self.last_update = last_update
+
 
 class ViveDecoder:
     def __init__(self):
-        self.ignore_tracking_reference = True
+        # raw 8-byte name -> (interned name, tracker id, keep)
+        self._name_cache = {}
+        # names and device classes of a packet -> keep mask of its records
+        self._keep_masks = {}
+        self.tracker_names = []
+        self._ignore_tracking_reference = True
+        self._ignored_vive_tracker_names = []
         self.vive_trackers = []
-        self.ignored_vive_tracker_names = []
         self.blobs = []
         self.label = 2222
         self.current_timestamp = 0
 
+    @property
+    def ignore_tracking_reference(self):
+        return self._ignore_tracking_reference
+
+    @ignore_tracking_reference.setter
+    def ignore_tracking_reference(self, ignore_tracking_reference):
+        self._ignore_tracking_reference = ignore_tracking_reference
+        self._rebuild_name_cache()
+
+    @property
+    def ignored_vive_tracker_names(self):
+        return self._ignored_vive_tracker_names
+
+    @ignored_vive_tracker_names.setter
+    def ignored_vive_tracker_names(self, vive_tracker_names):
+        self._ignored_vive_tracker_names = vive_tracker_names
+        self._rebuild_name_cache()
+
     def set_ignored_vive_tracker_names(self, vive_tracker_names):
-        self.ignored_vive_tracker_names = []
-        for tracker_name in vive_tracker_names:
-            name = tracker_name.lower()
-            self.ignored_vive_tracker_names.append(name)
+        self.ignored_vive_tracker_names = [
+            tracker_name.lower() for tracker_name in vive_tracker_names
+        ]
+
+    def tracker_id(self, name):
+        """Return the small integer id assigned to a tracker name, or None if it was never seen."""
+        entry = self._name_cache.get(name.encode("utf-8"))
+        return None if entry is None else entry[1]
+
+    def filter(self, vive_trackers):
+        """Drop the tracker dicts decode would have skipped, e.g. for frames decoded elsewhere."""
+        name_cache = self._name_cache
+        drop_references = self._ignore_tracking_reference
+        kept = []
+        for tracker in vive_trackers:
+            raw_name = tracker["name"].encode("utf-8")
+            entry = name_cache.get(raw_name)
+            if entry is None:
+                entry = self._intern_name(raw_name)
+            if entry[2] and not (drop_references and tracker["device_class"] == 4):
+                kept.append(tracker)
+        return kept
+
+    def _intern_name(self, raw_name):
+        """Add a raw name to the name cache and return its (name, tracker id, keep) entry."""
+        name = sys.intern(raw_name.decode("utf-8"))
+        if name in self.tracker_names:
+            tracker_id = self.tracker_names.index(name)
+        else:
+            tracker_id = len(self.tracker_names)
+            self.tracker_names.append(name)
+        entry = (name, tracker_id, self._keep_name(name))
+        self._name_cache[raw_name] = entry
+        return entry
+
+    def _keep_name(self, name):
+        if not self._ignore_tracking_reference:
+            return True
+        ignored_names = self._ignored_vive_tracker_names
+        return not (name.lower() in ignored_names or name.upper() in ignored_names)
+
+    def _rebuild_name_cache(self):
+        """Recompute the keep decisions, e.g. after the ignore list changed. Ids are kept."""
+        self._keep_masks.clear()
+        for raw_name, (name, tracker_id, _) in self._name_cache.items():
+            self._name_cache[raw_name] = (name, tracker_id, self._keep_name(name))
 
     def decode(self, byte_data):
         if len(byte_data) <= 2:
@@ -25,112 +337,273 @@ class ViveDecoder:
         if label != self.label:
             return
 
+        # work on a view so that no field is sliced out of the packet
+        view = memoryview(byte_data)
+
         # decode the trackers
-        vr_tracker_devices_count = byte_data[2]
+        vr_tracker_devices_count = view[2]
         vive_trackers = []
         index = 3
 
         if vr_tracker_devices_count > 0:
             self.current_timestamp = time.time()
+            name_cache = self._name_cache
+            drop_references = self._ignore_tracking_reference
+            unpack_head = _RECORD_HEAD.unpack_from
+            kept = []
             for _ in range(vr_tracker_devices_count):
-                tracker_name = byte_data[index : index + 8].decode("utf-8")
-                device_class = byte_data[index + 8]
-                battery = byte_data[index + 9] / 100.0
-                status = (byte_data[index + 10] & (1 << 0)) != 0
-                is_tracked = (byte_data[index + 10] & (1 << 1)) != 0
-                trackingResult = byte_data[index + 11]
-
-                position = [
-                    struct.unpack("<f", byte_data[index + 12 : index + 16])[0],
-                    struct.unpack("<f", byte_data[index + 16 : index + 20])[0],
-                    struct.unpack("<f", byte_data[index + 20 : index + 24])[0],
-                ]
-                rotation = [
-                    struct.unpack("<f", byte_data[index + 24 : index + 28])[0],
-                    struct.unpack("<f", byte_data[index + 28 : index + 32])[0],
-                    struct.unpack("<f", byte_data[index + 32 : index + 36])[0],
-                    struct.unpack("<f", byte_data[index + 36 : index + 40])[0],
-                ]
-                vr_tracker_device = {
-                    "name": tracker_name,
-                    "device_class": device_class,
-                    "battery": battery,
-                    "status": status,
-                    "is_tracked": is_tracked,
-                    "tracking_result": trackingResult,
-                    "position": position,
-                    "rotation": rotation,
-                }
-
-                ## TODO device class 2 not tested
-                if device_class == 2:
-                    vr_tracker_device["ul_button_pressed"] = int.from_bytes(
-                        byte_data[index + 40 : index + 48], "little"
-                    )
-                    vr_tracker_device["r_axis0"] = [
-                        struct.unpack("<f", byte_data[index + 48 : index + 52])[0],
-                        struct.unpack("<f", byte_data[index + 52 : index + 56])[0],
-                    ]
-                    vr_tracker_device["r_axis1"] = [
-                        struct.unpack("<f", byte_data[index + 56 : index + 60])[0],
-                        struct.unpack("<f", byte_data[index + 60 : index + 64])[0],
-                    ]
-                    vr_tracker_device["r_axis2"] = [
-                        struct.unpack("<f", byte_data[index + 64 : index + 68])[0],
-                        struct.unpack("<f", byte_data[index + 68 : index + 72])[0],
-                    ]
-                    vr_tracker_device["r_axis3"] = [
-                        struct.unpack("<f", byte_data[index + 72 : index + 76])[0],
-                        struct.unpack("<f", byte_data[index + 76 : index + 80])[0],
-                    ]
-                    vr_tracker_device["r_axis4"] = [
-                        struct.unpack("<f", byte_data[index + 80 : index + 84])[0],
-                        struct.unpack("<f", byte_data[index + 84 : index + 88])[0],
-                    ]
-                    index += 88
-                else:
-                    index += 40
-
-                can_add_tracker_device = True
-                if self.ignore_tracking_reference:
-                    if (
-                        vr_tracker_device["name"].lower()
-                        in self.ignored_vive_tracker_names
-                        or vr_tracker_device["name"].upper()
-                        in self.ignored_vive_tracker_names
-                        or vr_tracker_device["device_class"] == 4
-                    ):
-                        can_add_tracker_device = False
-
-                if can_add_tracker_device:
-                    vive_trackers.append(vr_tracker_device)
+                raw_name, device_class = unpack_head(view, index)
+                size = 88 if device_class == 2 else 40
+
+                entry = name_cache.get(raw_name)
+                if entry is None:
+                    entry = self._intern_name(raw_name)
+
+                # skip ignored trackers and tracking references before building them
+                if entry[2] and not (drop_references and device_class == 4):
+                    kept.append((entry[0], view, index))
+                index += size
+
+            vive_trackers = self._build_trackers(kept)
 
         self.vive_trackers = vive_trackers
 
         # ====================================================================================
         # decode the blobs
-        if index >= len(byte_data):
+        if index >= len(view):
             return self.vive_trackers, None
 
         # change battery to blobs_id for each tracker
         for tracker in self.vive_trackers:
-            tracker["blob_id"] = int(tracker["battery"] * 100)
+            tracker["blob_id"] = round(tracker["battery"] * 100)
 
-        blobs_count = byte_data[index]
+        blobs_count = view[index]
         blobs = []
         index += 1
 
         if blobs_count > 0:
+            unpack_blob = _BLOB_RECORD.unpack_from
             for _ in range(blobs_count):
-                position = [
-                    struct.unpack("<f", byte_data[index : index + 4])[0],
-                    struct.unpack("<f", byte_data[index + 4 : index + 8])[0],
-                ]
-                weight = struct.unpack("<f", byte_data[index + 8 : index + 12])[0]
-                blob = {"position": position, "weight": weight}
+                x, y, weight = unpack_blob(view, index)
+                blob = {"position": [x, y], "weight": weight}
                 blobs.append(blob)
                 index += 12
 
         self.blobs = blobs
 
         return self.vive_trackers, self.blobs
+
+    def scan_records(self, byte_data):
+        """
+        List the raw records of the trackers decode would keep, without
+        unpacking any field but the name and the device class.
+
+        Returns a list of (raw 8-byte name, memoryview of the 40- or 88-byte
+        record) pairs, or None if the packet is not a tracker packet. The
+        views point into byte_data and the blob section is skipped.
+        """
+        if len(byte_data) <= 2:
+            return None
+
+        label = int.from_bytes(byte_data[:2], "little")
+        if label != self.label:
+            return None
+
+        view = memoryview(byte_data)
+        count = view[2]
+        records = []
+        index = 3
+        name_cache = self._name_cache
+        drop_references = self._ignore_tracking_reference
+        unpack_head = _RECORD_HEAD.unpack_from
+        for _ in range(count):
+            raw_name, device_class = unpack_head(view, index)
+            size = 88 if device_class == 2 else 40
+            entry = name_cache.get(raw_name)
+            if entry is None:
+                entry = self._intern_name(raw_name)
+            if entry[2] and not (drop_references and device_class == 4):
+                records.append((raw_name, view[index : index + size]))
+            index += size
+        if index > len(view):
+            raise ValueError("Tracker section is truncated.")
+        return records
+
+    def decode_records(self, records):
+        """Build the tracker dicts of (raw name, record) pairs as listed by scan_records."""
+        if len(records) > 0:
+            self.current_timestamp = time.time()
+        name_cache = self._name_cache
+        kept = []
+        for raw_name, record in records:
+            entry = name_cache.get(raw_name)
+            if entry is None:
+                entry = self._intern_name(raw_name)
+            kept.append((entry[0], record, 0))
+        return self._build_trackers(kept)
+
+    def _build_trackers(self, kept):
+        """Build the tracker dicts of (name, buffer, offset) triples of tracker records."""
+        unpack_tracker = _TRACKER_RECORD.unpack_from
+        vive_trackers = []
+        for tracker_name, buffer, index in kept:
+            (
+                _,
+                device_class,
+                battery,
+                flags,
+                tracking_result,
+                px,
+                py,
+                pz,
+                qx,
+                qy,
+                qz,
+                qw,
+            ) = unpack_tracker(buffer, index)
+
+            vr_tracker_device = {
+                "name": tracker_name,
+                "device_class": device_class,
+                "battery": battery / 100.0,
+                "status": (flags & (1 << 0)) != 0,
+                "is_tracked": (flags & (1 << 1)) != 0,
+                "tracking_result": tracking_result,
+                "position": [px, py, pz],
+                "rotation": [qx, qy, qz, qw],
+            }
+
+            ## TODO device class 2 not tested
+            if device_class == 2:
+                controller = _CONTROLLER_RECORD.unpack_from(buffer, index + 40)
+                vr_tracker_device["ul_button_pressed"] = controller[0]
+                vr_tracker_device["r_axis0"] = [controller[1], controller[2]]
+                vr_tracker_device["r_axis1"] = [controller[3], controller[4]]
+                vr_tracker_device["r_axis2"] = [controller[5], controller[6]]
+                vr_tracker_device["r_axis3"] = [controller[7], controller[8]]
+                vr_tracker_device["r_axis4"] = [controller[9], controller[10]]
+
+            vive_trackers.append(vr_tracker_device)
+        return vive_trackers
+
+    def decode_arrays(self, byte_data):
+        """
+        Decode a packet into a ViveTrackerArrays without creating per-field
+        Python objects.
+
+        The tracker section is mapped onto TRACKER_DTYPE with np.frombuffer,
+        so the returned columns are views into byte_data. Packets containing
+        class 2 devices (88-byte records) fall back to gathering the 40-byte
+        record prefixes into a new array; the controller extension is dropped.
+        Ignored trackers and tracking references are filtered out as in decode.
+        """
+        if len(byte_data) <= 2:
+            return None
+
+        label = int.from_bytes(byte_data[:2], "little")
+        if label != self.label:
+            return None
+
+        view = memoryview(byte_data)
+        count = view[2]
+        if count > 0:
+            self.current_timestamp = time.time()
+
+        records, index = self._map_records(view, count)
+
+        keep = self._keep_mask(records)
+        if keep is not None:
+            records = records[keep]
+
+        blobs = None
+        if index < len(view):
+            blobs_count = view[index]
+            blobs = np.frombuffer(
+                view, dtype=BLOB_DTYPE, count=3 * blobs_count, offset=index + 1
+            ).reshape(blobs_count, 3)
+
+        return ViveTrackerArrays(records, blobs)
+
+    def decode_into(self, byte_data, table):
+        """
+        Decode the trackers of a packet in place into a ViveTrackerTable.
+
+        No per-tracker Python objects are created: the records are mapped
+        as in decode_arrays and copied into their slots with one assignment,
+        a slice assignment once the layout of the packets repeats.
+        The blob section is not decoded. Returns the number of trackers
+        written, or None if the packet is not a tracker packet.
+        """
+        if len(byte_data) <= 2:
+            return None
+
+        label = int.from_bytes(byte_data[:2], "little")
+        if label != self.label:
+            return None
+
+        view = memoryview(byte_data)
+        count = view[2]
+        table.dirty_mask[table.latest] = False
+        table.latest = slice(0, 0)
+        if count == 0:
+            return 0
+        self.current_timestamp = time.time()
+
+        records, _ = self._map_records(view, count)
+
+        raw = records.view(_RAW_RECORD)
+        names = records["name"]
+        keep = self._keep_mask(records)
+        if keep is not None:
+            raw = raw[keep]
+            names = names[keep]
+
+        slots = table.slots(names.view("<u8"))
+        table._raw[slots] = raw
+        table.dirty_mask[slots] = True
+        table.last_update[slots] = self.current_timestamp
+        table.latest = slots
+        return len(raw)
+
+    def _keep_mask(self, records):
+        """Boolean mask of the records decode would keep, or None if it keeps all of them."""
+        if not self._ignore_tracking_reference or len(records) == 0:
+            return None
+
+        # the same devices send the same layout packet after packet
+        layout = records["name"].tobytes() + records["device_class"].tobytes()
+        keep = self._keep_masks.get(layout, False)
+        if keep is not False:
+            return keep
+
+        name_cache = self._name_cache
+        keep_names = []
+        for raw_name in records["name"].tolist():
+            entry = name_cache.get(raw_name)
+            if entry is None:
+                entry = self._intern_name(raw_name)
+            keep_names.append(entry[2])
+        keep = (records["device_class"] != 4) & keep_names
+        if keep.all():
+            keep = None
+        if len(self._keep_masks) >= _MAX_LAYOUTS:
+            self._keep_masks.clear()
+        self._keep_masks[layout] = keep
+        return keep
+
+    def _map_records(self, view, count, index=3):
+        """Map count tracker records starting at index, return them and the end offset."""
+        start = index
+        offsets = []
+        for _ in range(count):
+            offsets.append(index)
+            index += 88 if view[index + 8] == 2 else 40
+        if index > len(view):
+            raise ValueError("Tracker section is truncated.")
+
+        if index == start + 40 * count:
+            return np.frombuffer(view, dtype=TRACKER_DTYPE, count=count, offset=start), index
+
+        # class 2 devices: gather the 40-byte prefixes of the records
+        prefixes = b"".join([view[offset : offset + 40] for offset in offsets])
+        return np.frombuffer(prefixes, dtype=TRACKER_DTYPE), index
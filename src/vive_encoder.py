@@ -1,68 +1,195 @@
 import struct
 
+import numpy as np
+
+from src.vive_decoder import BLOB_DTYPE, TRACKER_DTYPE
+
+# see ViveDecoder for the layout of the records
+_HEADER = struct.Struct("<HB")
+_TRACKER_RECORD = struct.Struct("<8sBBBB3f4f")
+_CONTROLLER_RECORD = struct.Struct("<Q10f")
+_BLOB_COUNT = struct.Struct("<B")
+_BLOB_RECORD = struct.Struct("<3f")
+_EMPTY_CONTROLLER = bytes(_CONTROLLER_RECORD.size)
+
 
 class ViveEncoder:
     def __init__(self):
         self.vive_trackers = []
         self.blobs = []
         self.label = 2222
+        self._buffer = bytearray(1460)
+        self._encoded_names = {}
 
     def encode(self):
-        # Create byte data
-        byte_data = bytearray()
-
-        # Add label (2 bytes, little-endian)
-        byte_data.extend(struct.pack("<H", self.label))
-
-        # Add number of devices (1 byte)
-        byte_data.extend(struct.pack("<B", len(self.vive_trackers)))
+        return bytes(self.encode_view())
+
+    def _reserve(self, size):
+        if size > len(self._buffer):
+            # never resize in place, earlier views may still be exported
+            self._buffer = bytearray(max(size, 2 * len(self._buffer)))
+        return self._buffer
+
+    def encode_records(self, records):
+        """
+        Build a packet from raw tracker records, e.g. as listed by
+        ViveDecoder.scan_records. The records are copied as they are.
+        """
+        records = list(records)
+        return _HEADER.pack(self.label, len(records)) + b"".join(records)
+
+    def encode_view(self):
+        """
+        Encode into a reusable buffer and return a memoryview of the packet.
+
+        The view can be passed straight to socket.sendto but is only valid
+        until the next call; use encode() for data that is queued or kept.
+        """
+        blobs = self.blobs
+        vive_trackers = self.vive_trackers
+
+        # compute the exact packet size up front
+        size = _HEADER.size
+        for device in vive_trackers:
+            size += 88 if device["device_class"] == 2 else 40
+        if blobs:
+            size += _BLOB_COUNT.size + _BLOB_RECORD.size * len(blobs)
+        buffer = self._reserve(size)
+
+        # Add label (2 bytes, little-endian) and number of devices (1 byte)
+        _HEADER.pack_into(buffer, 0, self.label, len(vive_trackers))
+        index = _HEADER.size
 
         # Add device data
-        for device in self.vive_trackers:
-            # Encode name (as bytes, followed by a null terminator for safety)
-            byte_data.extend(device["name"].encode("utf-8"))
-
-            # Encode device class (1 byte)
-            byte_data.extend(struct.pack("<B", device["device_class"]))
-
-            if self.blobs:
-                # Encode blob_id (1 byte, integer ranging from 0 to 10)
-                byte_data.extend(struct.pack("<B", int(device["blob_id"])))
+        encoded_names = self._encoded_names
+        for device in vive_trackers:
+            name = encoded_names.get(device["name"])
+            if name is None:
+                name = encoded_names[device["name"]] = device["name"].encode("utf-8")
+
+            if blobs:
+                # blob_id (integer ranging from 0 to 10) in place of the battery
+                battery = int(device["blob_id"])
             else:
-                # Encode battery percentage (1 byte, scaled to 0-100)
-                byte_data.extend(struct.pack("<B", int(device["battery"] * 100)))
-
-            # Encode status and tracking flags (1 byte each)
-            byte_data.extend(struct.pack("<B", 1 if device["status"] else 0))
-            byte_data.extend(struct.pack("<B", 1 if device["is_tracked"] else 0))
-
-            # Encode position (3 floats, 4 bytes each)
-            for pos in device["position"]:
-                byte_data.extend(struct.pack("<f", pos))
-
-            # Encode rotation (4 floats, 4 bytes each)
-            for rot in device["rotation"]:
-                byte_data.extend(struct.pack("<f", rot))
+                # battery percentage scaled to 0-100, rounded so that a
+                # decoded battery byte encodes to the same byte again
+                battery = round(device["battery"] * 100)
+
+            position = device["position"]
+            rotation = device["rotation"]
+            _TRACKER_RECORD.pack_into(
+                buffer,
+                index,
+                name,
+                device["device_class"],
+                battery,
+                1 if device["status"] else 0,
+                1 if device["is_tracked"] else 0,
+                position[0],
+                position[1],
+                position[2],
+                rotation[0],
+                rotation[1],
+                rotation[2],
+                rotation[3],
+            )
+            index += 40
 
             ## TODO device class 2 not tested
             # # Encode additional data for device class 2
             if device["device_class"] == 2:
-                # Encode button pressed (8 bytes)
-                byte_data.extend(struct.pack("<Q", device["ul_button_pressed"]))
-
-                # Encode axes data (5 axes, each with 2 floats)
-                for axis in range(5):
-                    byte_data.extend(struct.pack("<ff", *device[f"r_axis{axis}"]))
+                # button pressed (8 bytes) and 5 axes with 2 floats each
+                _CONTROLLER_RECORD.pack_into(
+                    buffer,
+                    index,
+                    device["ul_button_pressed"],
+                    *device["r_axis0"],
+                    *device["r_axis1"],
+                    *device["r_axis2"],
+                    *device["r_axis3"],
+                    *device["r_axis4"],
+                )
+                index += 48
 
         # check if blobs are present
-        if self.blobs:
+        if blobs:
             # Add number of blobs (1 byte)
-            byte_data.extend(struct.pack("<B", len(self.blobs)))
-
-            # Add blob data
-            for blob in self.blobs:
-                # Encode position (3 floats, 4 bytes each)
-                for pos in blob:
-                    byte_data.extend(struct.pack("<f", pos))
-
-        return bytes(byte_data)
+            _BLOB_COUNT.pack_into(buffer, index, len(blobs))
+            index += _BLOB_COUNT.size
+
+            # Add blob data (3 floats, 4 bytes each)
+            for blob in blobs:
+                _BLOB_RECORD.pack_into(buffer, index, *blob)
+                index += _BLOB_RECORD.size
+
+        return memoryview(buffer)[:size]
+
+    def encode_arrays(self, frame, blobs=None, blob_ids=None):
+        """
+        Encode a ViveTrackerArrays frame without going through tracker dicts.
+
+        The records are copied in one structured assignment into a
+        TRACKER_DTYPE view of the reusable buffer, so the cost hardly depends
+        on the number of trackers. blobs is a sequence or (B, 3) array of
+        (x, y, weight) and blob_ids an (N,) array as returned by
+        ViveBlobber.process_arrays, required with blobs. Without blobs the
+        battery byte of the records is written as it is, which is what
+        encode() writes for the decoded battery. The packet matches encode()
+        for the same trackers, except that the controller section of class 2
+        devices is zero-filled since frames do not carry it.
+
+        Returns a memoryview that is only valid until the next encode.
+        """
+        records = frame.records
+        count = len(records)
+        if blobs is not None:
+            blobs = np.asarray(blobs, dtype="<f4").reshape(-1, 3)
+            if len(blobs) == 0:
+                blobs = None
+            elif blob_ids is None or len(blob_ids) != count:
+                raise ValueError("Blobs need a blob_id per tracker, see ViveBlobber.process_arrays.")
+
+        controllers = np.flatnonzero(records["device_class"] == 2)
+        tracker_size = _TRACKER_RECORD.size * count + _CONTROLLER_RECORD.size * len(controllers)
+        size = _HEADER.size + tracker_size
+        if blobs is not None:
+            size += _BLOB_COUNT.size + _BLOB_RECORD.size * len(blobs)
+        buffer = self._reserve(size)
+        _HEADER.pack_into(buffer, 0, self.label, count)
+
+        if len(controllers) == 0:
+            out = np.frombuffer(buffer, dtype=TRACKER_DTYPE, count=count, offset=_HEADER.size)
+        else:
+            out = np.empty(count, dtype=TRACKER_DTYPE)
+
+        flags = records["flags"]
+        out[...] = records
+        if blobs is not None:
+            # blob_id in place of the battery
+            out["battery"] = blob_ids
+        # like encode(): status and is_tracked as 0/1 in the flag bytes
+        out["flags"] = flags & 1
+        out["tracking_result"] = (flags >> 1) & 1
+
+        if len(controllers):
+            # copy the runs of plain records between the controllers, whose
+            # button and axis section is zero-filled
+            index = _HEADER.size
+            start = 0
+            for stop in (controllers + 1).tolist():
+                length = _TRACKER_RECORD.size * (stop - start)
+                buffer[index : index + length] = out[start:stop].tobytes()
+                index += length
+                buffer[index : index + _CONTROLLER_RECORD.size] = _EMPTY_CONTROLLER
+                index += _CONTROLLER_RECORD.size
+                start = stop
+            buffer[index : index + _TRACKER_RECORD.size * (count - start)] = out[start:].tobytes()
+
+        if blobs is not None:
+            index = _HEADER.size + tracker_size
+            _BLOB_COUNT.pack_into(buffer, index, len(blobs))
+            np.frombuffer(
+                buffer, dtype=BLOB_DTYPE, count=blobs.size, offset=index + _BLOB_COUNT.size
+            )[:] = blobs.ravel()
+
+        return memoryview(buffer)[:size]
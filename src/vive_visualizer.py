@@ -5,7 +5,7 @@ import queue
 
 
 class ViveVisualizer:
-    def __init__(self, canvas, root):
+    def __init__(self, canvas, root, channel=None):
         self.canvas = canvas
         self.blobs = []
         self.trackers = []
@@ -15,7 +15,8 @@ class ViveVisualizer:
         self.draw_blobs = False
         self.thread = None
         self.running = False
-        self.queue = queue.Queue()
+        # see src.channels.make_channel
+        self.queue = channel if channel is not None else queue.Queue()
         self.radius = 1
         self.visualize = True
         self.root = root
@@ -197,7 +197,7 @@ class ViveDecoder:
         
         # change battery to blobs_id for each tracker
         for tracker in self.vive_trackers:
-            tracker['blob_id'] = int(tracker['battery'] * 100)
+            tracker['blob_id'] = round(tracker['battery'] * 100)
             # remove battery
             tracker.pop('battery')
 
@@ -0,0 +1,108 @@
+import sys
+import os
+import json
+import time
+import argparse
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.sources import Player, Synchronizer
+from src.processor import Processor
+from src.senders import UDPSenderQ
+from src.channels import make_channel
+from src.latency import LatencyStats
+from src.replay_cache import ReplayCache
+
+
+def bench(file_path, config, duration, rate=None, arrays=False, queue_size=8, cache=False):
+    """
+    Play file_path through Synchronizer -> Processor -> UDPSenderQ for
+    duration seconds, at rate times the recorded speed or, without a rate,
+    as fast as the pipeline takes the records.
+    """
+    latency = LatencyStats()
+    sender = UDPSenderQ("127.0.0.1", 40650, latency=latency)
+    sender.start()
+    sent = [0]
+
+    def send(data, marks=None):
+        sender.send(data, marks)
+        sent[0] += 1
+
+    # bounded edges hold the player back instead of dropping frames
+    synchronizer = Synchronizer(
+        channel=make_channel("bounded", queue_size),
+        inbox=make_channel("bounded", queue_size),
+    )
+    # the array path decodes packets in place, the dict path gets frames
+    synchronizer.set_frame_mode(not arrays)
+    synchronizer.set_stamping(True)
+    processor = Processor(
+        callback_data=synchronizer.get_data_block, callback=send, config=config
+    )
+    processor.set_use_arrays(arrays)
+    processor.set_augment_data(config.get("augment_data", False))
+    processor.set_ignore_vive_tracker_names(config.get("ignore_vive_tracker_names", []))
+    replay_cache = ReplayCache() if cache else None
+    synchronizer.set_replay_cache(replay_cache, sources=["player"])
+    processor.set_replay_cache(replay_cache)
+
+    player = Player(streaming=True)
+    player.load(file_path)
+    if rate is None:
+        player.set_unthrottled(True)
+    else:
+        player.set_rate(rate)
+    player.set_callback(synchronizer.add_source("player"))
+
+    synchronizer.start()
+    processor.start()
+    start = time.perf_counter()
+    player.start()
+    time.sleep(duration)
+    elapsed = time.perf_counter() - start
+    played, processed = player.played, sent[0]
+
+    # free the producers before stopping the stages they wait on
+    synchronizer.inbox.close()
+    synchronizer.queue.close()
+    player.close()
+    processor.close()
+    processor.thread.join()
+    synchronizer.close()
+    sender.close()
+
+    mode = "unthrottled" if rate is None else f"{rate:g}x"
+    if cache:
+        mode += ", cached"
+    total = latency.summary().get("total", {})
+    print(
+        f"{mode:<20} {'arrays' if arrays else 'dicts':<7} "
+        f"played {played / elapsed:8.0f} records/s  sent {processed / elapsed:8.0f} frames/s  "
+        f"latency p50 {total.get('p50', '-')} ms p99 {total.get('p99', '-')} ms"
+    )
+    return latency
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Throughput of the processing pipeline.")
+    parser.add_argument("file", nargs="?", default="recordings/apr2_7ppl.bin")
+    parser.add_argument("-c", "--config", default="config.json")
+    parser.add_argument("-d", "--duration", type=float, default=5.0)
+    parser.add_argument(
+        "--replay-cache", action="store_true", help="Also run with a replay cache"
+    )
+    parser.add_argument(
+        "-r", "--rate", type=float, action="append", help="Playback rate(s), unthrottled without"
+    )
+    args = parser.parse_args()
+
+    with open(args.config, "r", encoding="utf-8") as f:
+        config = json.load(f)
+
+    print(f"{args.file}: {args.duration:g} s per run")
+    for rate in args.rate or [None]:
+        for cache in (False, True) if args.replay_cache else (False,):
+            for arrays in (False, True):
+                latency = bench(args.file, config, args.duration, rate, arrays, cache=cache)
+    for stage, summary in latency.summary().items():
+        print(f"  {stage:<8} {summary}")
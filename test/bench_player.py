@@ -0,0 +1,57 @@
+import sys
+import os
+import time
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.recording import load_from_bin
+from src.playback_clock import PlaybackClock
+from src.latency import LatencyHistogram
+
+
+def legacy_play(timestamps):
+    """The time.time and sleep pacing Player.play used to have, returns the lateness."""
+    lateness = []
+    start_time = time.time()
+    for timestamp in timestamps:
+        time_diff = time.time() - start_time
+        if time_diff < timestamp:
+            time.sleep(timestamp - time_diff)
+        lateness.append(time.time() - start_time - timestamp)
+    return lateness
+
+
+def clock_play(timestamps, spin):
+    clock = PlaybackClock(spin=spin)
+    clock.start(timestamps[0])
+    return [clock.wait(timestamp) for timestamp in timestamps]
+
+
+def report(name, run, timestamps):
+    cpu_start = time.process_time()
+    late = run(timestamps)
+    cpu = time.process_time() - cpu_start
+    duration = timestamps[-1] - timestamps[0]
+    lateness = LatencyHistogram()
+    for seconds in late:
+        lateness.record(seconds)
+    summary = lateness.summary()
+    missed = sum(seconds > 0.001 for seconds in late)
+    print(
+        f"{name:<20} late p50 {summary['p50']:6.3f} ms  p99 {summary['p99']:6.3f} ms  "
+        f"max {summary['max']:6.3f} ms  > 1 ms {missed:4d}/{summary['count']}  "
+        f"cpu {cpu / duration * 100:4.1f} %"
+    )
+
+
+if __name__ == "__main__":
+
+    file_path = sys.argv[1] if len(sys.argv) > 1 else "recordings/apr2_7ppl.bin"
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 10.0
+
+    timestamps = [timestamp for timestamp, _ in load_from_bin(file_path)]
+    timestamps = [t for t in timestamps if t - timestamps[0] <= seconds]
+    print(f"{file_path}: pacing {len(timestamps)} records over {seconds:g} s")
+
+    report("legacy sleep", legacy_play, timestamps)
+    report("clock, no spin", lambda t: clock_play(t, 0.0), timestamps)
+    report("clock, 0.5 ms spin", lambda t: clock_play(t, 0.0005), timestamps)
+    report("clock, 2 ms spin", lambda t: clock_play(t, 0.002), timestamps)
@@ -0,0 +1,119 @@
+import sys
+import os
+import time
+import socket
+import threading
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.sources import UDPReceiverQ, Player
+from src.udp_stats import set_receive_buffer
+
+
+class LegacyReceiver(UDPReceiverQ):
+    """The one recvfrom per loop with a 0.1 s timeout that UDPReceiverQ used to be."""
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind((self.ip, self.port))
+        if self.rcvbuf:
+            self.effective_rcvbuf = set_receive_buffer(self.sock, self.rcvbuf)
+        self.sock.settimeout(0.1)
+        self._is_connected = True
+        return True
+
+    def handle_data(self):
+        while self.running:
+            try:
+                data, addr = self.sock.recvfrom(self.buffer_size)
+                if self.callback:
+                    self.callback(data)
+                else:
+                    self.data_queue.put(data)
+            except socket.timeout:
+                continue
+
+    def stop(self):
+        self.running = False
+        if self.thread:
+            self.thread.join()
+
+
+def send_bursts(port, packets, senders, burst, pause):
+    """Several senders that each fire bursts of packets, as multiple PCs would."""
+
+    def sender(offset):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        for start in range(offset * burst, len(packets), senders * burst):
+            for packet in packets[start : start + burst]:
+                sock.sendto(packet, ("127.0.0.1", port))
+            time.sleep(pause)
+        sock.close()
+
+    threads = [threading.Thread(target=sender, args=(i,)) for i in range(senders)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def bench(name, receiver_class, packets, port, senders=8, burst=32, pause=0.002, **kwargs):
+    received = [0]
+    wakeups = [0]
+    receiver = None
+
+    def callback(data):
+        received[0] += 1
+        receiver.release(data)
+
+    receiver = receiver_class("127.0.0.1", port, callback=callback, **kwargs)
+
+    # CPU time of the receive thread alone, the senders run in this process too
+    thread_cpu = [0.0]
+    handle_data = receiver.handle_data
+
+    def timed_handle_data():
+        cpu_start = time.thread_time()
+        handle_data()
+        thread_cpu[0] = time.thread_time() - cpu_start
+
+    receiver.handle_data = timed_handle_data
+    receiver.start()
+
+    # count the loop iterations of the receive thread
+    drain = getattr(receiver, "drain", None)
+    if drain is not None and receiver_class is not LegacyReceiver:
+        def counted_drain():
+            wakeups[0] += 1
+            return drain()
+        receiver.drain = counted_drain
+
+    start = time.perf_counter()
+    send_bursts(port, packets, senders, burst, pause)
+    time.sleep(0.2)
+    wall = time.perf_counter() - start
+    stats = receiver.stats()
+    receiver.close()
+    cpu = thread_cpu[0]
+
+    misses = receiver.pool.misses if receiver.pool else 0
+    print(
+        f"{name:<16} {received[0]:6d}/{len(packets)} received  "
+        f"receive thread cpu {cpu / len(packets) * 1e6:5.2f} us/packet  "
+        f"wall {wall:5.2f} s  wakeups {wakeups[0] or '-'}  pool misses {misses}  "
+        f"kernel drops {stats['dropped']} (rcvbuf {stats['rcvbuf']})"
+    )
+
+
+if __name__ == "__main__":
+
+    file_path = sys.argv[1] if len(sys.argv) > 1 else "recordings/apr2_7ppl.bin"
+
+    player = Player()
+    player.load(file_path)
+    packets = [data for _, data in player.data] * 4
+    print(f"{file_path}: sending {len(packets)} packets over loopback in bursts")
+
+    rcvbuf = int(sys.argv[2]) if len(sys.argv) > 2 else 1 << 21
+    bench("legacy recvfrom", LegacyReceiver, packets, 40601, rcvbuf=rcvbuf)
+    bench("drain to bytes", UDPReceiverQ, packets, 40602, rcvbuf=rcvbuf)
+    bench("drain to pool", UDPReceiverQ, packets, 40603, rcvbuf=rcvbuf, pool_size=256)
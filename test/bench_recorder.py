@@ -0,0 +1,105 @@
+import sys
+import os
+import time
+import queue
+import threading
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.recorder import Recorder
+from src.recording import load_from_bin
+
+
+class LegacyRecorder(Recorder):
+    """The 1 ns sleep loop that Recorder.record_loop used to be."""
+
+    def record_loop(self):
+        while not self.killme:
+            if self.recording:
+                self.record()
+            time.sleep(0.000000001)
+
+    def stop(self):
+        self.recording = False
+
+    def close(self):
+        self.killme = True
+        self.thread.join()
+
+
+def _get(source, timeout=0.1):
+    """UDPReceiverQ.get_data_block, the input main.py used to poll."""
+    try:
+        return source.get(timeout=timeout)
+    except queue.Empty:
+        return None
+
+
+def feed(put, packets, rate, duration):
+    """Hand out packets at rate per second for duration seconds."""
+    start = time.perf_counter()
+    count = 0
+    while time.perf_counter() - start < duration:
+        put(packets[count % len(packets)])
+        count += 1
+        delay = start + count / rate - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+
+def bench(name, make_recorder, packets, rate, duration):
+    source = queue.Queue()
+    recorder, put = make_recorder(source)
+
+    # idle: the GUI is open but nothing is recorded
+    cpu_start = time.process_time()
+    time.sleep(duration)
+    idle = (time.process_time() - cpu_start) / duration
+
+    # recording: the feeder runs in this process as well, for both recorders
+    recorder.start()
+    cpu_start = time.process_time()
+    feeder = threading.Thread(target=feed, args=(put, packets, rate, duration))
+    feeder.start()
+    feeder.join()
+    active = (time.process_time() - cpu_start) / duration
+    time.sleep(0.2)
+    recorder.stop()
+    recorder.close()
+
+    print(
+        f"{name:<28} idle cpu {idle * 100:5.1f} %  recording cpu {active * 100:5.1f} %  "
+        f"recorded {len(recorder.data)}/{int(rate * duration)}"
+    )
+
+
+if __name__ == "__main__":
+
+    file_path = sys.argv[1] if len(sys.argv) > 1 else "recordings/apr2_7ppl.bin"
+    rate = float(sys.argv[2]) if len(sys.argv) > 2 else 120.0
+    duration = 3.0
+
+    packets = [data for _, data in load_from_bin(file_path)]
+    print(f"{file_path}: recording {rate:g} packets/s, {duration:g} s idle and {duration:g} s active")
+
+    bench(
+        "legacy spin loop",
+        lambda source: (
+            LegacyRecorder(callback_data=lambda: _get(source)),
+            source.put,
+        ),
+        packets,
+        rate,
+        duration,
+    )
+    bench(
+        "event-driven, polled",
+        lambda source: (Recorder(callback_data=lambda: _get(source)), source.put),
+        packets,
+        rate,
+        duration,
+    )
+
+    def pushed(source):
+        recorder = Recorder()
+        return recorder, recorder.update
+
+    bench("event-driven, pushed", pushed, packets, rate, duration)
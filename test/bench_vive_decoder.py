@@ -0,0 +1,119 @@
+import sys
+import os
+import time
+import struct
+import gc
+from collections import deque
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.vive_decoder import ViveDecoder, ViveTrackerTable
+from src.sources import Player
+
+
+def legacy_decode(byte_data, ignored_vive_tracker_names):
+    """The per-field struct.unpack decoder ViveDecoder.decode used to be (trackers only)."""
+    vr_tracker_devices_count = byte_data[2]
+    vive_trackers = []
+    index = 3
+    for _ in range(vr_tracker_devices_count):
+        tracker_name = byte_data[index : index + 8].decode("utf-8")
+        device_class = byte_data[index + 8]
+        battery = byte_data[index + 9] / 100.0
+        status = (byte_data[index + 10] & (1 << 0)) != 0
+        is_tracked = (byte_data[index + 10] & (1 << 1)) != 0
+        trackingResult = byte_data[index + 11]
+        position = [
+            struct.unpack("<f", byte_data[index + 12 : index + 16])[0],
+            struct.unpack("<f", byte_data[index + 16 : index + 20])[0],
+            struct.unpack("<f", byte_data[index + 20 : index + 24])[0],
+        ]
+        rotation = [
+            struct.unpack("<f", byte_data[index + 24 : index + 28])[0],
+            struct.unpack("<f", byte_data[index + 28 : index + 32])[0],
+            struct.unpack("<f", byte_data[index + 32 : index + 36])[0],
+            struct.unpack("<f", byte_data[index + 36 : index + 40])[0],
+        ]
+        vr_tracker_device = {
+            "name": tracker_name,
+            "device_class": device_class,
+            "battery": battery,
+            "status": status,
+            "is_tracked": is_tracked,
+            "tracking_result": trackingResult,
+            "position": position,
+            "rotation": rotation,
+        }
+        if device_class == 2:
+            vr_tracker_device["ul_button_pressed"] = int.from_bytes(
+                byte_data[index + 40 : index + 48], "little"
+            )
+            for axis in range(5):
+                offset = index + 48 + axis * 8
+                vr_tracker_device[f"r_axis{axis}"] = [
+                    struct.unpack("<f", byte_data[offset : offset + 4])[0],
+                    struct.unpack("<f", byte_data[offset + 4 : offset + 8])[0],
+                ]
+            index += 88
+        else:
+            index += 40
+        if (
+            vr_tracker_device["name"].lower() in ignored_vive_tracker_names
+            or vr_tracker_device["name"].upper() in ignored_vive_tracker_names
+            or vr_tracker_device["device_class"] == 4
+        ):
+            continue
+        vive_trackers.append(vr_tracker_device)
+    return vive_trackers
+
+
+def bench(name, fn, packets, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for packet in packets:
+            fn(packet)
+        best = min(best, time.perf_counter() - start)
+    per_packet = best / len(packets) * 1e6
+    print(f"{name:<24} {per_packet:8.2f} us/packet")
+    return per_packet
+
+
+def gc_collections(fn, packets, backlog=100):
+    """Garbage collections triggered while the last decoded frames are kept alive, as in a queue."""
+    retained = deque(maxlen=backlog)
+    before = sum(stats["collections"] for stats in gc.get_stats())
+    for packet in packets:
+        retained.append(fn(packet))
+    return sum(stats["collections"] for stats in gc.get_stats()) - before
+
+
+if __name__ == "__main__":
+
+    file_path = sys.argv[1] if len(sys.argv) > 1 else "recordings/apr2_7ppl.bin"
+
+    player = Player()
+    player.load(file_path)
+    packets = [data for _, data in player.data]
+    print(f"{file_path}: {len(packets)} packets, {packets[0][2]} records in the first one")
+
+    decoder = ViveDecoder()
+    decoder.set_ignored_vive_tracker_names(["2B9219E9"])
+
+    # the fast path must not change the output
+    for packet in packets:
+        decoder.decode(packet)
+        assert decoder.vive_trackers == legacy_decode(
+            packet, decoder.ignored_vive_tracker_names
+        ), "Fast path output differs from the legacy decoder"
+    print("Output identical to the legacy decoder.")
+
+    before = bench("legacy struct.unpack", lambda p: legacy_decode(p, ["2b9219e9"]), packets)
+    after = bench("ViveDecoder.decode", decoder.decode, packets)
+    print(f"speedup: {before / after:.2f}x")
+
+    bench("ViveDecoder.decode_arrays", decoder.decode_arrays, packets)
+    table = ViveTrackerTable()
+    bench("ViveDecoder.decode_into", lambda p: decoder.decode_into(p, table), packets)
+
+    print(f"gc collections over {len(packets)} packets:")
+    print(f"  decode       {gc_collections(decoder.decode, packets)}")
+    print(f"  decode_into  {gc_collections(lambda p: decoder.decode_into(p, table), packets)}")
@@ -0,0 +1,681 @@
+import sys
+import os
+import copy
+import time
+import socket
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import numpy as np
+from src.vive_decoder import ViveDecoder, ViveTrackerArrays, ViveTrackerTable
+from src.vive_encoder import ViveEncoder
+from src.vive_blobber import ViveBlobber
+from src.vive_augmentor import ViveAugmentor
+from src.recording import load_from_bin, decode_recording, open_bin
+from src.sources import Synchronizer, MultiUDPReceiverQ, UDPReceiverQ, Player
+from src.tracker_store import TrackerStore
+from src.channels import make_channel
+from src.latency import LatencyHistogram, LatencyStats, StampedBytes
+from src.senders import UDPSenderQ
+from src.udp_stats import proc_net_udp_drops
+from src.replay_cache import ReplayCache
+from src.recorder import Recorder
+from src.processor import Processor
+
+if __name__ == "__main__":
+
+    byte_data = b'\xae\x08\x072B9219E9\x03d\x01\x01\xeb\x00&?n\x9f{@RQo@\xb91W\xbf\xc9\xc0\x07\xbf\xcdT\xc1=xZj=8992BF03\x03T\x00\x005*M\xc0 B\x05>\n\xbaC\xc0\xc7\x1bq\xbe\xf6Pw\xbf\x1bH\x1d=\xde\x7f\xca=4CDFCB8B\x032\x01\x01=\\\x06\xbf\xc0^\xe1?\x01\xde\xae\xbeu\rD\xbfS\x83\x89=\xe2\xc9\xbf=N\xf4!?3AD07E7B\x04\x00\x01\x01\x99\xd6w@>\xbbl@Dj!\xbf\xe0\xb3{>\xe6\x18%\xbf\x1e\x800>@\xec3?292B164A\x04\x00\x01\x01\xc0\xe4m\xc0X\\s@\xcf\xbe\xc7>\x00)\x80\xbe\x1dH$\xbf\x1d4\x99>l\t)\xbf26D688D6\x04\x00\x01\x01\xefI\xec\xbd\x9c\x02v@\xf4\xe9m@{\xf6\xa3\xbc\xd5\xadq\xbf/m\xa7>9^\x1a\xbd1FA80E86\x04\x00\x01\x01\xd8\xb3R\xbc Gt@\xef\tp\xc0\xe0\xe1\xb7>\xb2\x07-={\t\xee\xbb\x02\xabn?'
+
+    # =============================================================================
+    # the array decode mode matches the dict decoder
+
+    decoder = ViveDecoder()
+    decoder.decode(byte_data)
+    frame = decoder.decode_arrays(byte_data)
+
+    assert len(frame) == 3, "Number of devices is not equal to 3"
+    assert frame.positions.shape == (3, 3) and frame.positions.dtype == np.float32
+    assert frame.rotations.shape == (3, 4)
+    assert frame.to_dicts() == decoder.vive_trackers, "Array frame differs from decode"
+    assert frame.blobs is None
+    print('\nTest 1 passed!')
+
+    # the columns are views into the packet
+    decoder.set_ignored_vive_tracker_names([])
+    decoder.ignore_tracking_reference = False
+    frame = decoder.decode_arrays(byte_data)
+    assert len(frame) == 7
+    assert np.shares_memory(frame.positions, np.frombuffer(byte_data, dtype=np.uint8))
+    print('\nTest 2 passed!')
+
+    # ignore list
+    decoder = ViveDecoder()
+    decoder.set_ignored_vive_tracker_names(['2B9219E9'])
+    decoder.decode(byte_data)
+    frame = decoder.decode_arrays(byte_data)
+    assert frame.to_dicts() == decoder.vive_trackers
+    assert len(frame) == 2, "Number of devices is not equal to 2"
+    print('\nTest 3 passed!')
+
+    # =============================================================================
+    # mixed packets with class 2 devices and blobs
+
+    controller = {
+        'name': 'FD0C50D1',
+        'device_class': 2,
+        'battery': 0.5,
+        'status': True,
+        'is_tracked': True,
+        'blob_id': 1,
+        'position': [1.0, 2.0, 3.0],
+        'rotation': [0.0, 0.0, 0.0, 1.0],
+        'ul_button_pressed': 4,
+        'r_axis0': [0.5, 0.5],
+        'r_axis1': [0.0, 0.0],
+        'r_axis2': [0.0, 0.0],
+        'r_axis3': [0.0, 0.0],
+        'r_axis4': [0.0, 0.0],
+    }
+    decoder = ViveDecoder()
+    trackers = decoder.decode(byte_data)[0]
+    for tracker in trackers:
+        tracker['blob_id'] = 0
+    encoder = ViveEncoder()
+    encoder.vive_trackers = trackers[:1] + [controller] + trackers[1:]
+    encoder.blobs = [(1.0, 2.0, 2.0), (3.0, 4.0, 1.0)]
+    encoded_data = encoder.encode()
+
+    decoder.decode(encoded_data)
+    frame = decoder.decode_arrays(encoded_data)
+    expected = [
+        {key: value for key, value in tracker.items() if not key.startswith(('ul_', 'r_axis'))}
+        for tracker in decoder.vive_trackers
+    ]
+    assert frame.to_dicts() == expected, "Mixed packet differs from decode"
+    assert frame.blobs.tolist() == [[1.0, 2.0, 2.0], [3.0, 4.0, 1.0]]
+    print('\nTest 4 passed!')
+
+    # =============================================================================
+    # blobber, augmentor and classifier input
+
+    decoder = ViveDecoder()
+    trackers = decoder.decode(encoded_data)[0]
+    for tracker in trackers:
+        tracker['is_tracked'] = True
+    frame = decoder.decode_arrays(encoded_data)
+    is_tracked = np.ones(len(frame), dtype=bool)
+
+    blobber = ViveBlobber(radius=2)
+    blobs, blob_ids = blobber.process_arrays(frame.positions, is_tracked)
+    expected_blobs, expected_trackers = blobber.process_data(copy.deepcopy(trackers))
+    assert blobs == expected_blobs
+    assert blob_ids.tolist() == [tracker['blob_id'] for tracker in expected_trackers]
+    print('\nTest 5 passed!')
+
+    augmentor = ViveAugmentor()
+    for slider_value in (2, len(frame), 20):
+        augmented = augmentor.augment_arrays(frame, slider_value)
+        expected = augmentor.augment(frame.to_dicts(), slider_value)
+        assert len(augmented) == slider_value
+        assert [name.decode() for name in augmented.names] == [t['name'] for t in expected]
+        np.testing.assert_allclose(
+            augmented.positions, [t['position'] for t in expected], atol=1e-5
+        )
+    print('\nTest 6 passed!')
+
+    # =============================================================================
+    # whole-recording decoder matches decoding packet by packet
+
+    recording_path = os.path.join(os.path.dirname(__file__), '..', 'recordings', 'apr2_7ppl.bin')
+    recording = decode_recording(recording_path, ['2B9219E9'])
+    decoder = ViveDecoder()
+    decoder.set_ignored_vive_tracker_names(['2B9219E9'])
+
+    for frame, (timestamp, data) in enumerate(load_from_bin(recording_path)):
+        decoder.decode(data)
+        assert recording.timestamps[frame] == timestamp
+        assert recording.present[frame].sum() == len(decoder.vive_trackers)
+        for tracker in decoder.vive_trackers:
+            column = recording.index[tracker['name']]
+            assert recording.positions[frame, column].tolist() == tracker['position']
+            assert recording.rotations[frame, column].tolist() == tracker['rotation']
+            assert recording.tracked[frame, column] == tracker['is_tracked']
+            assert recording.tracking_result[frame, column] == tracker['tracking_result']
+    assert np.isnan(recording.positions[~recording.present]).all()
+    print('\nTest 7 passed!')
+
+    # =============================================================================
+    # in-place decode into the per-tracker state table
+
+    table = ViveTrackerTable(capacity=2)
+    decoder = ViveDecoder()
+    decoder.set_ignored_vive_tracker_names(['2B9219E9'])
+    assert decoder.decode_into(byte_data, table) == 2
+    assert table.names == ['8992BF03', '4CDFCB8B']
+    assert table.dirty.tolist() == [True, True]
+    assert table.frame().to_dicts() == decoder.decode(byte_data)[0]
+    assert table.frame().to_dicts() == decoder.decode_arrays(byte_data).to_dicts()
+
+    # slots persist and grow, only the trackers of the latest packet are dirty
+    decoder.set_ignored_vive_tracker_names([])
+    assert decoder.decode_into(byte_data, table) == 3
+    assert table.names == ['8992BF03', '4CDFCB8B', '2B9219E9']
+    assert table.dirty.tolist() == [True, True, True]
+    assert table.frame().to_dicts() == decoder.decode(byte_data)[0]
+    decoder.set_ignored_vive_tracker_names(['8992BF03'])
+    assert decoder.decode_into(byte_data, table) == 2
+    assert table.dirty.tolist() == [False, True, True]
+    assert table.frame().to_dicts() == decoder.decode(byte_data)[0]
+    assert decoder.decode_into(b'\xae\x08\x00', table) == 0
+    assert not table.dirty.any() and len(table.frame()) == 0
+    print('\nTest 8 passed!')
+
+    # =============================================================================
+    # name cache follows changes of the ignore list
+
+    decoder = ViveDecoder()
+    assert len(decoder.decode(byte_data)[0]) == 3
+    tracker_id = decoder.tracker_id('2B9219E9')
+    assert decoder.tracker_names[tracker_id] == '2B9219E9'
+
+    decoder.set_ignored_vive_tracker_names(['2b9219e9'])
+    assert len(decoder.decode(byte_data)[0]) == 2
+    assert len(decoder.decode_arrays(byte_data)) == 2
+
+    decoder.ignored_vive_tracker_names = []
+    assert len(decoder.decode(byte_data)[0]) == 3
+    assert len(decoder.decode_arrays(byte_data)) == 3
+    assert decoder.tracker_id('2B9219E9') == tracker_id
+
+    decoder.ignore_tracking_reference = False
+    assert len(decoder.decode(byte_data)[0]) == 7
+    assert len(decoder.decode_arrays(byte_data)) == 7
+    print('\nTest 9 passed!')
+
+    # =============================================================================
+    # encoding into the reusable buffer
+
+    trackers = ViveDecoder().decode(encoded_data)[0]
+    encoder = ViveEncoder()
+    encoder.vive_trackers = trackers
+    encoder.blobs = [(1.0, 2.0, 2.0), (3.0, 4.0, 1.0)]
+    view = encoder.encode_view()
+    assert isinstance(view, memoryview)
+    assert view == encoder.encode(), "encode_view differs from encode"
+    encoder.blobs = []
+    assert encoder.encode_view() == encoder.encode()
+    assert len(encoder.encode()) == 3 + 40 * (len(trackers) - 1) + 88
+    print('\nTest 10 passed!')
+
+    # =============================================================================
+    # encoding straight from arrays
+
+    decoder = ViveDecoder()
+    frame = decoder.decode_arrays(encoded_data)
+    blobs, blob_ids = ViveBlobber(radius=2).process_arrays(frame.positions, frame.is_tracked)
+    trackers = decoder.decode(encoded_data)[0]
+    for tracker, blob_id in zip(trackers, blob_ids.tolist()):
+        tracker["blob_id"] = blob_id
+        if tracker["device_class"] == 2:
+            # frames do not carry the controller section, it is encoded as zeros
+            tracker["ul_button_pressed"] = 0
+            for axis in range(5):
+                tracker[f"r_axis{axis}"] = [0.0, 0.0]
+    encoder = ViveEncoder()
+    encoder.vive_trackers = trackers
+    encoder.blobs = blobs
+    assert encoder.encode_arrays(frame, blobs, blob_ids) == encoder.encode()
+    encoder.blobs = []
+    assert encoder.encode_arrays(frame) == encoder.encode()
+    try:
+        encoder.encode_arrays(frame, [(1.0, 2.0, 2.0)])
+        assert False
+    except ValueError:
+        pass
+    frame = frame.select(frame.device_class != 2)
+    encoder.vive_trackers = frame.to_dicts()
+    assert encoder.encode_arrays(frame) == encoder.encode()
+
+    # every battery byte survives decoding, 29 / 100 * 100 is just below 29
+    frame.records["battery"] = np.arange(len(frame)) * 29 % 101
+    packet = bytes(encoder.encode_arrays(frame))
+    trackers = decoder.decode(packet)[0]
+    assert [tracker["battery"] for tracker in trackers] == frame.battery.tolist()
+    encoder.vive_trackers = trackers
+    assert encoder.encode() == packet
+    assert ViveTrackerArrays.from_dicts(trackers).records.tobytes() == frame.records.tobytes()
+    print('\nTest 11 passed!')
+
+    # =============================================================================
+    # the synchronizer splices raw records, later sources win
+
+    decoder = ViveDecoder()
+    records = decoder.scan_records(encoded_data)
+    assert [bytes(record) for _, record in records] == [
+        encoded_data[3:43], encoded_data[43:131]
+    ] + [encoded_data[131 + 40 * i:171 + 40 * i] for i in range(2)]
+    assert decoder.scan_records(b'\x00\x00\x00') is None
+
+    first = encoder.encode_records([record for _, record in records[:2]])
+    second = encoder.encode_records([record for _, record in records[1:]])
+    synchronizer = Synchronizer([
+        {"name": "first", "callback": lambda timeout: first, "timeout": 0},
+        {"name": "second", "callback": lambda timeout: second, "timeout": 0},
+    ])
+    synchronizer.sync()
+    assert synchronizer.get_data_block_nowait() == encoded_data[:131 + 80]
+    print('\nTest 12 passed!')
+
+    # in frame mode the synchronizer hands out the decoded trackers instead
+    synchronizer.sync()
+    packet = synchronizer.get_data_block_nowait()
+    synchronizer.set_frame_mode(True)
+    synchronizer.sync()
+    trackers = synchronizer.get_data_block_nowait()
+    assert trackers == ViveDecoder().decode(packet)[0]
+    frame = ViveDecoder().decode_arrays(packet)
+    assert ViveTrackerArrays.from_dicts(trackers).records.tobytes() == frame.records.tobytes()
+
+    decoder = ViveDecoder()
+    decoder.set_ignored_vive_tracker_names(['FD0C50D1'])
+    assert decoder.filter(trackers) == decoder.decode(packet)[0]
+    print('\nTest 13 passed!')
+
+    # =============================================================================
+    # pushed packets are merged as soon as they arrive
+
+    synchronizer = Synchronizer(merge_window=0.05)
+    push_first = synchronizer.add_source("first")
+    push_second = synchronizer.add_source("second")
+    push_second(second)
+    push_first(first)
+    synchronizer.merge()
+    assert synchronizer.get_data_block_nowait() == encoded_data[:131 + 80]
+
+    # a source that does not deliver holds the frame back by the merge window
+    # at most, its trackers stay in the frame until they are stale
+    start = time.perf_counter()
+    push_first(first)
+    synchronizer.merge()
+    assert synchronizer.get_data_block_nowait() == encoded_data[:131 + 80]
+    assert time.perf_counter() - start < 0.1
+    assert synchronizer.store.sources[records[1][0]] == "first"
+    assert synchronizer.store.sources[records[-1][0]] == "second"
+
+    synchronizer.store.ttl = 0.01
+    time.sleep(0.02)
+    push_first(first)
+    synchronizer.merge()
+    assert synchronizer.get_data_block_nowait() == first
+
+    synchronizer.remove_source("first")
+    push_first(first)
+    synchronizer.merge()
+    assert synchronizer.get_data_block_nowait() is None
+    assert len(synchronizer.store) == 0
+
+    # a fifo inbox loses nothing, a second packet of a source starts the next frame
+    synchronizer = Synchronizer(merge_window=0.05)
+    push_first = synchronizer.add_source("first")
+    push_second = synchronizer.add_source("second")
+    push_first(first)
+    push_first(first)
+    push_second(second)
+    synchronizer.merge()
+    assert synchronizer.get_data_block_nowait() == first
+    assert synchronizer.get_data_block_nowait() == encoded_data[:131 + 80]
+    assert synchronizer.coalesced == 0
+
+    # a latest-value inbox coalesces and counts what it replaced
+    synchronizer = Synchronizer(merge_window=0.05, coalesce=True)
+    push_first = synchronizer.add_source("first")
+    push_first(first)
+    push_first(first)
+    synchronizer.merge()
+    assert synchronizer.get_data_block_nowait() == first
+    assert synchronizer.get_data_block_nowait() is None
+    assert synchronizer.coalesced == 1
+    print('\nTest 14 passed!')
+
+    # =============================================================================
+    # the store resamples positions to the output clock
+
+    store = TrackerStore(ttl=1.0)
+    name, record = records[0]
+    moved = bytearray(record)
+    moved[12:24] = np.array([1.0, 2.0, 3.0], dtype='<f4').tobytes()
+    store.update(name, record, "first", 10.0)
+    assert store.sample(10.5)[0][1] == record
+    store.update(name, moved, "first", 10.1)
+    x0 = np.frombuffer(record, dtype='<f4', count=3, offset=12)
+    for timestamp, weight in [(10.05, 0.5), (10.1, 1.0), (10.12, 1.2), (10.5, 1.5), (9.0, 0.0)]:
+        sampled = store.sample(timestamp)[0][1]
+        position = np.frombuffer(sampled, dtype='<f4', count=3, offset=12)
+        assert np.allclose(position, x0 + ([1.0, 2.0, 3.0] - x0) * weight, atol=1e-5)
+        assert sampled[:12] == record[:12] and sampled[24:] == moved[24:]
+    # a reordered older packet does not roll the tracker back
+    assert not store.update(name, record, "first", 10.05)
+    assert store.records[name] == moved and store.last_update[name] == 10.1
+    assert store.evict(11.2) == [name] and len(store) == 0
+    # with two sources the one merged last wins, however the packets arrived
+    synchronizer = Synchronizer()
+    push_a = synchronizer.add_source("a")
+    push_b = synchronizer.add_source("b")
+    moved_packet = bytearray(first)
+    moved_packet[15:27] = np.array([1.0, 2.0, 3.0], dtype='<f4').tobytes()
+    now = time.perf_counter()
+    push_b(bytes(moved_packet), now)
+    push_a(first, now + 0.001)
+    synchronizer.merge()
+    assert synchronizer.store.sources[name] == "b"
+    assert synchronizer.store.records[name] == moved_packet[3:43]
+    try:
+        Synchronizer(tracker_ttl=None, output_rate=60)
+        assert False
+    except ValueError:
+        pass
+    print('\nTest 15 passed!')
+
+    # =============================================================================
+    # latest-value channels keep the newest packet per source and frame
+
+    synchronizer = Synchronizer(
+        tracker_ttl=None,
+        channel=make_channel("latest"),
+        inbox=make_channel("latest", maxsize=4, key=lambda item: item[0]),
+    )
+    push_first = synchronizer.add_source("first")
+    push_second = synchronizer.add_source("second")
+    for _ in range(3):
+        push_first(second)
+        push_first(first)
+    synchronizer.merge()
+    assert synchronizer.inbox.dropped == 5
+    push_second(second)
+    synchronizer.merge()
+    assert synchronizer.queue.dropped == 1
+    assert synchronizer.get_data_block_nowait() == second
+    assert synchronizer.get_data_block_nowait() is None
+    print('\nTest 16 passed!')
+
+    # =============================================================================
+    # one receive thread serves several ports, datagrams keep their endpoint
+
+    synchronizer = Synchronizer(tracker_ttl=None)
+    receiver = MultiUDPReceiverQ(
+        [("127.0.0.1", 40711), ("127.0.0.1", 40712)],
+        callback=synchronizer.push_datagram,
+        rcvbuf=1 << 20,
+    )
+    assert receiver.start()
+    assert not receiver.kernel_timestamps
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.sendto(first, ("127.0.0.1", 40711))
+    sock.sendto(second, ("127.0.0.1", 40712))
+    sock.close()
+    deadline = time.perf_counter() + 1.0
+    while receiver.received < 2 and time.perf_counter() < deadline:
+        time.sleep(0.01)
+    stats = receiver.stats()
+    receiver.close()
+    assert stats["received"] == 2 and stats["rcvbuf"] >= 1 << 16
+    assert sorted(stats["endpoints"]) == ["127.0.0.1:40711", "127.0.0.1:40712"]
+    assert sorted(synchronizer.sources) == ["127.0.0.1:40711", "127.0.0.1:40712"]
+    synchronizer.merge()
+    assert {synchronizer.store.sources[name] for name, _ in records[:2]} <= set(synchronizer.sources)
+    print('\nTest 17 passed!')
+
+    # =============================================================================
+    # packets are stamped on arrival and their latency is counted per stage
+
+    histogram = LatencyHistogram()
+    for _ in range(1000):
+        histogram.record(0.001)
+    for _ in range(5):
+        histogram.record(0.1)
+    assert 0.001 <= histogram.percentile(50) < 0.001 * 2 ** 0.25
+    assert histogram.percentile(99) < 0.002 and histogram.percentile(100) == 0.1
+
+    synchronizer = Synchronizer(tracker_ttl=None)
+    synchronizer.set_stamping(True)
+    receiver = UDPReceiverQ(
+        "127.0.0.1", 40713, callback=synchronizer.add_source("receiver"), timestamps=True
+    )
+    assert receiver.start()
+    sent = time.perf_counter()
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.sendto(first, ("127.0.0.1", 40713))
+    sock.close()
+    synchronizer.merge(timeout=1.0)
+    receiver.close()
+    packet = synchronizer.get_data_block_nowait()
+    assert isinstance(packet, StampedBytes) and packet == first
+    (_, arrival), (_, merged) = packet.marks
+    assert sent - 0.001 <= arrival <= merged
+    stats = LatencyStats()
+    UDPSenderQ(latency=stats).record(packet.marks)
+    assert set(stats.summary()) == {"merge", "send", "total"}
+    assert stats.summary()["total"]["count"] == 1
+    print('\nTest 18 passed!')
+
+    # =============================================================================
+    # datagrams dropped on a full receive buffer show up in the receiver stats
+
+    received = []
+    receiver = UDPReceiverQ("127.0.0.1", 40714, callback=received.append, rcvbuf=4096)
+    assert receiver.connect()
+    assert receiver.stats()["rcvbuf"] >= 4096
+    # drained by hand below instead of by the thread
+    receiver.running = True
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    for _ in range(200):
+        sock.sendto(first, ("127.0.0.1", 40714))
+    # the count comes with the first datagram queued after the drops
+    queued = receiver.drain()
+    sock.sendto(first, ("127.0.0.1", 40714))
+    time.sleep(0.05)
+    queued += receiver.drain()
+    sock.close()
+    stats = receiver.stats()
+    if stats["dropped"] is not None:
+        assert stats["dropped"] == 201 - queued
+        assert proc_net_udp_drops(receiver.sock) in (None, stats["dropped"])
+    receiver.running = False
+    receiver.close()
+    print('\nTest 19 passed!')
+
+    # =============================================================================
+    # a mapped recording yields the same records as the loaded one
+
+    recording = open_bin(recording_path)
+    streamed = [(timestamp, bytes(data)) for timestamp, data in recording]
+    assert streamed == load_from_bin(recording_path)
+    recording.close()
+    print('\nTest 20 passed!')
+
+    # =============================================================================
+    # the player seeks and trims by the record timestamps
+
+    recorded = load_from_bin(recording_path)
+    for streaming in (False, True):
+        played = []
+        player = Player(played.append, streaming=streaming)
+        player.load(recording_path)
+        assert player.frame_count() == len(recorded)
+        end = recorded[-1][0]
+        player.set_trim(end - 0.3, end - 0.1)
+        player.playing = True
+        player.play()
+        trim_first = player.find(end - 0.3)
+        trim_last = player.find(end - 0.1)
+        assert [bytes(data) for data in played] == [
+            data for _, data in recorded[trim_first:trim_last]
+        ]
+        played.clear()
+        player.set_trim()
+        player.jump_to_frame(len(recorded) - 3)
+        player.play()
+        assert [bytes(data) for data in played] == [data for _, data in recorded[-3:]]
+        player.playing = False
+        player.close()
+    assert os.path.exists(recording_path + ".idx")
+    print('\nTest 21 passed!')
+
+    # =============================================================================
+    # an unthrottled player runs no faster than a bounded channel is emptied
+
+    channel = make_channel("bounded", 2)
+    player = Player(streaming=True, channel=channel)
+    player.load(recording_path)
+    player.set_unthrottled(True)
+    player.start()
+    for _ in range(5):
+        time.sleep(0.02)
+        assert player.get_data_block() is not None
+    assert player.played <= 5 + 2 + 1
+    try:
+        player.set_rate(32)
+        assert False
+    except ValueError:
+        pass
+    channel.close()
+    player.close()
+    print('\nTest 22 passed!')
+
+    # =============================================================================
+    # frames of a replay cache carry their records as key and skip decoding once cached
+
+    cache = ReplayCache()
+    synchronizer = Synchronizer(tracker_ttl=None)
+    synchronizer.set_frame_mode(True)
+    synchronizer.set_replay_cache(cache, sources=["first"])
+    push_first = synchronizer.add_source("first")
+    push_first(first)
+    synchronizer.merge()
+    frame = synchronizer.get_data_block_nowait()
+    assert frame == synchronizer.decoder.decode_records(ViveDecoder().scan_records(first))
+    cache.put(frame.key, b"processed")
+    push_first(first)
+    synchronizer.merge()
+    cached = synchronizer.get_data_block_nowait()
+    assert cached == [] and cached.key == frame.key
+    assert cache.get(cached.key) == (b"processed", None) and cache.stats()["hits"] == 1
+    cache.clear()
+    assert cached.key not in cache
+    # a live source in the mix turns the keys off
+    synchronizer.add_source("live")
+    push_first(first)
+    synchronizer.merge()
+    assert not hasattr(synchronizer.get_data_block_nowait(), "key")
+    # frames left empty for a warm cache still go out whole with bypass on
+    model_path = os.path.join(os.path.dirname(__file__), '..', 'model.pkl')
+    sent = []
+    processor = Processor(
+        callback_data=None,
+        callback=lambda data: sent.append(data[2]),
+        config={"classifier_path": model_path},
+    )
+    processor.set_augment_data(False)
+    processor.set_replay_cache(cache)
+    synchronizer.remove_source("live")
+    for bypass in (False, False, True, True):
+        processor.set_bypass(bypass)
+        push_first(first)
+        synchronizer.merge()
+        processor.process_data(synchronizer.get_data_block_nowait())
+    assert cache.stats()["frames"] == 1 and len(sent) == 4
+    assert sent[2] == sent[3] == first[2]
+    # the array pipeline gets packets, they are their own key
+    synchronizer.set_frame_mode(False)
+    processor.set_bypass(False)
+    processor.set_use_arrays(True)
+    hits = cache.stats()["hits"]
+    for _ in range(2):
+        push_first(first)
+        synchronizer.merge()
+        processor.process_data(synchronizer.get_data_block_nowait())
+    assert sent[4] == sent[5] > 0
+    assert cache.stats()["frames"] == 2 and cache.stats()["hits"] == hits + 1
+    print('\nTest 23 passed!')
+
+    # =============================================================================
+    # a playlist plays back to back, an overlay renames the trackers apart
+
+    other_path = os.path.join(os.path.dirname(__file__), '..', 'recordings', 'ale.bin')
+    other = load_from_bin(other_path)
+    played = []
+    player = Player(played.append, streaming=True)
+    player.load_playlist([recording_path, other_path])
+    player.set_unthrottled(True)
+    player.playing = True
+    player.play()
+    player.next_recording()
+    player.play()
+    assert [bytes(data) for data in played] == [data for _, data in recorded + other]
+
+    # a recording that cannot be opened is skipped, the player stops if none can
+    missing_path = os.path.join(os.path.dirname(__file__), 'missing.bin')
+    player.load_playlist([recording_path, missing_path, other_path])
+    player.playing = True
+    player.next_recording()
+    assert player.playlist_index == 2 and player.data
+    player.load_playlist([missing_path, missing_path])
+    player.playing = True
+    player.next_recording()
+    assert not player.playing and player.data == []
+    player.close()
+    try:
+        player.load_playlist([])
+        assert False
+    except ValueError:
+        pass
+
+    player = Player()
+    player.load_playlist([recording_path, recording_path], overlay=True)
+    assert len(player.data) == 2 * len(recorded)
+    decoder = ViveDecoder()
+    names = {name for _, data in player.data for name, _ in decoder.scan_records(data) or []}
+    originals = {name for _, data in recorded for name, _ in decoder.scan_records(data) or []}
+    assert names == originals | {b"G" + name[1:] for name in originals}
+    print('\nTest 24 passed!')
+
+    # =============================================================================
+    # the recorder sleeps until started and records what is pushed meanwhile
+
+    recorder = Recorder()
+    recorder.update(first)
+    recorder.start()
+    recorder.update(first)
+    recorder.update(second)
+    deadline = time.perf_counter() + 1.0
+    while len(recorder.data) < 2 and time.perf_counter() < deadline:
+        time.sleep(0.01)
+    recorder.stop()
+    recorder.update(first)
+    recorder.close()
+    assert not recorder.thread.is_alive()
+    assert [data for _, data in recorder.data] == [first, second]
+    print('\nTest 25 passed!')
+
+    # =============================================================================
+    # pooled datagrams go back to the pool once stored, dropped or replaced
+
+    synchronizer = Synchronizer(
+        tracker_ttl=None, inbox=make_channel("latest", maxsize=1, key=lambda item: item[0])
+    )
+    receiver = UDPReceiverQ("127.0.0.1", 40715, pool_size=8)
+    receiver.callback = synchronizer.add_source("receiver", release=receiver.release)
+    assert receiver.start()
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    for _ in range(50):
+        sock.sendto(first, ("127.0.0.1", 40715))
+    sock.close()
+    deadline = time.perf_counter() + 1.0
+    while receiver.received < 50 and time.perf_counter() < deadline:
+        time.sleep(0.01)
+    synchronizer.merge()
+    receiver.close()
+    assert receiver.received == 50 and synchronizer.inbox.dropped == 49
+    assert receiver.pool.available() == len(receiver.pool) and receiver.pool.misses == 0
+    assert synchronizer.get_data_block_nowait() == synchronizer.encoder.encode_records(
+        record for _, record in ViveDecoder().scan_records(first)
+    )
+    print('\nTest 26 passed!')